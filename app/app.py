@@ -7,9 +7,22 @@ import sys
 import threading
 import queue
 import logging
-from datetime import datetime
 from importlib.util import spec_from_file_location, module_from_spec
 
+# 项目根目录，监控核心组件(core)位于此目录下
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+from core.run_history import RunHistoryStore, DEFAULT_DB_PATH
+from core.config_catalog import ConfigCatalog
+
+try:
+    import gevent
+    from gevent import monkey as gevent_monkey
+except ImportError:
+    gevent = None
+
 app = Flask(__name__)
 sock = Sock(app)
 
@@ -23,17 +36,28 @@ LOG_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'logs')
 os.makedirs(CONFIG_DIR, exist_ok=True)
 os.makedirs(LOG_DIR, exist_ok=True)
 
+# 已保存配置的索引
+config_catalog = ConfigCatalog(CONFIG_DIR)
+
 # 全局变量
 monitor_thread = None
 monitor_stop_event = threading.Event()
-log_queue = queue.Queue()
-clients = set()
+# 日志队列上限，分发线程跟不上时丢弃新日志而不是无限占用内存
+LOG_QUEUE_SIZE = 10000
+# 每个客户端待发送消息的上限，超过说明客户端接收过慢，直接断开
+CLIENT_OUTBOX_SIZE = 1000
+log_queue = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+# WebSocket连接 -> 该连接的待发送队列
+clients = {}
+clients_lock = threading.Lock()
 
 class WebSocketHandler(logging.Handler):
     def emit(self, record):
         try:
             log_entry = self.format(record)
-            log_queue.put(log_entry)
+            log_queue.put_nowait(log_entry)
+        except queue.Full:
+            pass
         except Exception:
             self.handleError(record)
 
@@ -64,23 +88,26 @@ def load_config(config_path=DEFAULT_CONFIG_PATH):
     except Exception as e:
         return None
 
-def save_config(config_data, filename):
-    """保存配置到文件"""
-    file_path = os.path.join(CONFIG_DIR, filename)
+def save_config(config_data, name):
+    """
+    保存配置到配置目录
+
+    Returns:
+        tuple: (文件名, 是否复用了内容相同的已有配置)，失败时文件名为None
+    """
     try:
-        # 保存到指定文件
-        with open(file_path, 'w', encoding='utf-8') as f:
-            yaml.dump(config_data, f, allow_unicode=True)
+        # 保存到配置目录，相同名称且内容相同的配置不会重复保存
+        filename, deduplicated = config_catalog.save(name, config_data)
             
         # 同时更新主配置文件
         with open(DEFAULT_CONFIG_PATH, 'w', encoding='utf-8') as f:
             yaml.dump(config_data, f, allow_unicode=True)
             
         logger.info(f"配置已保存到: {filename}")
-        return True
+        return filename, deduplicated
     except Exception as e:
         logger.error(f"保存配置失败: {str(e)}")
-        return False
+        return None, False
 
 def validate_config(config_data):
     """验证配置数据的类型"""
@@ -98,6 +125,22 @@ def validate_config(config_data):
             monitor['check_gpu_power_threshold'] = float(monitor['check_gpu_power_threshold'])
         if 'check_gpu_power_consecutive_checks' in monitor:
             monitor['check_gpu_power_consecutive_checks'] = int(monitor['check_gpu_power_consecutive_checks'])
+        for key in ('check_host_idle_cpu_threshold', 'check_host_idle_disk_threshold', 'check_host_idle_net_threshold'):
+            if key in monitor:
+                monitor[key] = float(monitor[key])
+        for key in ('check_host_idle_consecutive_checks', 'host_telemetry_interval',
+                    'check_ckpt_min_count', 'check_ckpt_stable_checks'):
+            if key in monitor:
+                monitor[key] = int(monitor[key])
+        if 'check_gpu_job_pid' in monitor:
+            pid = monitor['check_gpu_job_pid']
+            monitor['check_gpu_job_pid'] = int(pid) if pid not in (None, '', 'None') else None
+        if 'check_ckpt_min_epoch' in monitor:
+            epoch = monitor['check_ckpt_min_epoch']
+            monitor['check_ckpt_min_epoch'] = int(epoch) if epoch not in (None, '', 'None') else None
+        for key in ('check_gpu_job_cgroup', 'check_gpu_job_process_name'):
+            if key in monitor and monitor[key] in ('', 'None'):
+                monitor[key] = None
             
         return True
     except (ValueError, TypeError) as e:
@@ -109,25 +152,115 @@ def broadcast_message(message_type, data):
         'type': message_type,
         'data': data
     })
-    dead_clients = set()
+    send_raw_message(message)
+
+def send_raw_message(message):
+    """
+    将已序列化的消息放入所有WebSocket客户端的待发送队列
+
+    不会阻塞：实际发送由各连接自己的处理线程完成，
+    待发送队列已满（客户端接收过慢）的连接会被移除并断开。
+    """
+    with clients_lock:
+        targets = list(clients.items())
+    lagging = []
     
-    for client in clients:
+    for client, outbox in targets:
         try:
-            client.send(message)
-        except Exception:
-            dead_clients.add(client)
+            outbox.put_nowait(message)
+        except queue.Full:
+            lagging.append(client)
     
-    # 移除断开的客户端
-    clients.difference_update(dead_clients)
+    # 移除跟不上的客户端，其处理线程发现后会关闭连接
+    if lagging:
+        with clients_lock:
+            for client in lagging:
+                clients.pop(client, None)
+        logger.warning(f"{len(lagging)} 个WebSocket客户端接收过慢，已断开")
+
+def pump_log_queue():
+    """
+    日志分发线程：从日志队列取出消息并一次性分发给所有客户端
+
+    每条消息只序列化一次，分发只是放入各客户端的待发送队列，
+    某个客户端卡住不会影响其他客户端。
+    """
+    while True:
+        log_message = log_queue.get()
+        try:
+            if isinstance(log_message, dict):
+                # 状态变更消息
+                send_raw_message(json.dumps(log_message))
+            else:
+                # 普通日志消息
+                send_raw_message(json.dumps({
+                    'type': 'log',
+                    'message': log_message
+                }))
+        except Exception:
+            pass
+
+log_pump_thread = threading.Thread(target=pump_log_queue, name='log-pump')
+log_pump_thread.daemon = True
+log_pump_thread.start()
+
+def gevent_patched():
+    """是否运行在打过补丁的gevent模式下（线程已被替换为协程）"""
+    return gevent is not None and gevent_monkey.is_module_patched('threading')
+
+def run_blocking(func, *args, **kwargs):
+    """
+    执行会长时间占用CPU或磁盘的操作（SQLite统计、日志解压等）
+
+    gevent模式下放到gevent线程池的真实线程中执行，避免阻塞事件循环；
+    其他模式下直接在当前线程执行。
+    """
+    if gevent_patched():
+        return gevent.get_hub().threadpool.apply(func, args, kwargs)
+    return func(*args, **kwargs)
+
+class NativeWorker:
+    """
+    在gevent线程池的真实线程中运行的后台任务，接口与 threading.Thread 的常用部分一致
+
+    被打补丁后 threading.Thread 只是协程，监控循环中的文件扫描和解压会阻塞所有连接，
+    因此gevent模式下监控程序改用真实线程运行。
+    """
+
+    def __init__(self, target):
+        self._result = gevent.get_hub().threadpool.spawn(target)
+
+    def is_alive(self):
+        return not self._result.ready()
+
+    def join(self, timeout=None):
+        self._result.wait(timeout)
+
+def start_background(target):
+    """启动后台任务，gevent模式下使用真实线程"""
+    if gevent_patched():
+        return NativeWorker(target)
+    worker = threading.Thread(target=target)
+    worker.daemon = True
+    worker.start()
+    return worker
+
+def get_monitor_status():
+    """获取监控程序当前状态"""
+    return 'running' if (monitor_thread and monitor_thread.is_alive()) else 'stopped'
+
+def load_monitor_module():
+    """动态导入main.py"""
+    spec = spec_from_file_location("monitor_main", MAIN_SCRIPT_PATH)
+    module = module_from_spec(spec)
+    sys.modules["monitor_main"] = module
+    spec.loader.exec_module(module)
+    return module
 
 def run_monitor():
     """运行监控程序"""
     try:
-        # 动态导入main.py
-        spec = spec_from_file_location("monitor_main", MAIN_SCRIPT_PATH)
-        module = module_from_spec(spec)
-        sys.modules["monitor_main"] = module
-        spec.loader.exec_module(module)
+        module = load_monitor_module()
         
         # 加载当前配置
         config = load_config()
@@ -160,44 +293,40 @@ def index():
     """主页路由"""
     config = load_config()
     # 检查监控状态
-    status = 'running' if (monitor_thread and monitor_thread.is_alive()) else 'stopped'
-    return render_template('index.html', config=config, initial_status=status)
+    return render_template('index.html', config=config, initial_status=get_monitor_status())
 
 @sock.route('/ws')
 def handle_websocket(ws):
-    """处理WebSocket连接"""
-    clients.add(ws)
+    """处理WebSocket连接，由本连接的处理线程负责发送其待发送队列中的消息"""
+    outbox = queue.Queue(maxsize=CLIENT_OUTBOX_SIZE)
+    # 发送初始状态（只在连接建立时发送一次）
+    outbox.put_nowait(json.dumps({
+        'type': 'status',
+        'data': {'status': get_monitor_status()}
+    }))
+    with clients_lock:
+        clients[ws] = outbox
     try:
-        # 发送初始状态（只在连接建立时发送一次）
-        status = 'running' if (monitor_thread and monitor_thread.is_alive()) else 'stopped'
-        ws.send(json.dumps({
-            'type': 'status',
-            'data': {'status': status}
-        }))
-        
-        while True:
-            # 从日志队列获取消息并发送
+        while ws.connected:
             try:
-                while True:
-                    log_message = log_queue.get_nowait()
-                    if isinstance(log_message, dict) and log_message.get('type') == 'status':
-                        # 状态变更消息
-                        ws.send(json.dumps(log_message))
-                    else:
-                        # 普通日志消息
-                        ws.send(json.dumps({
-                            'type': 'log',
-                            'message': log_message
-                        }))
+                message = outbox.get(timeout=1)
             except queue.Empty:
+                message = None
+            with clients_lock:
+                if clients.get(ws) is not outbox:
+                    # 接收过慢已被移除
+                    break
+            if message is not None:
+                ws.send(message)
+            # 丢弃客户端发来的消息
+            while ws.receive(timeout=0) is not None:
                 pass
-            
-            # 等待一小段时间
-            ws.sleep(0.1)
     except Exception:
         pass
     finally:
-        clients.remove(ws)
+        with clients_lock:
+            if clients.get(ws) is outbox:
+                del clients[ws]
 
 def broadcast_status_change(status):
     """广播状态变更消息"""
@@ -205,7 +334,10 @@ def broadcast_status_change(status):
         'type': 'status',
         'data': {'status': status}
     }
-    log_queue.put(message)
+    try:
+        log_queue.put(message, timeout=1)
+    except queue.Full:
+        logger.warning("日志队列已满，状态变更消息未能广播")
 
 @app.route('/api/monitor/start', methods=['POST'])
 def start_monitor():
@@ -227,9 +359,7 @@ def start_monitor():
             }), 400
             
         monitor_stop_event.clear()
-        monitor_thread = threading.Thread(target=run_monitor)
-        monitor_thread.daemon = True
-        monitor_thread.start()
+        monitor_thread = start_background(run_monitor)
         
         # 广播状态变更
         broadcast_status_change('running')
@@ -281,6 +411,94 @@ def stop_monitor():
             'message': str(e)
         }), 500
 
+@app.route('/api/monitor/status', methods=['GET'])
+def monitor_status():
+    """获取监控状态"""
+    return jsonify({
+        'status': get_monitor_status()
+    })
+
+history_stores = {}
+
+def get_history_store():
+    """获取运行历史存储，路径与监控程序的配置保持一致"""
+    config = load_config() or {}
+    db_path = config.get('monitor', {}).get('history_db_path') or DEFAULT_DB_PATH
+    if db_path not in history_stores:
+        history_stores[db_path] = RunHistoryStore(db_path)
+    return history_stores[db_path]
+
+@app.route('/api/runs', methods=['GET'])
+def list_runs():
+    """分页查询运行历史"""
+    try:
+        result = run_blocking(
+            get_history_store().query_runs,
+            project=request.args.get('project'),
+            host=request.args.get('host'),
+            method=request.args.get('method'),
+            since=request.args.get('since'),
+            until=request.args.get('until'),
+            limit=request.args.get('limit', 50),
+            cursor=request.args.get('cursor')
+        )
+        return jsonify({
+            'status': 'success',
+            'runs': result['runs'],
+            'next_cursor': result['next_cursor']
+        })
+    except ValueError as e:
+        return jsonify({
+            'status': 'error',
+            'message': f'查询参数无效: {str(e)}'
+        }), 400
+    except Exception as e:
+        logger.error(f"查询运行历史失败: {str(e)}")
+        return jsonify({
+            'status': 'error',
+            'message': str(e)
+        }), 500
+
+@app.route('/api/runs/<int:run_id>', methods=['GET'])
+def get_run(run_id):
+    """获取单条运行记录"""
+    run = get_history_store().get_run(run_id)
+    if not run:
+        return jsonify({
+            'status': 'error',
+            'message': '运行记录不存在'
+        }), 404
+    return jsonify({
+        'status': 'success',
+        'run': run
+    })
+
+@app.route('/api/runs/stats', methods=['GET'])
+def run_stats():
+    """按项目统计运行耗时（平均值、p50、p95等）"""
+    try:
+        stats = run_blocking(
+            get_history_store().duration_stats,
+            project=request.args.get('project'),
+            since=request.args.get('since'),
+            until=request.args.get('until')
+        )
+        return jsonify({
+            'status': 'success',
+            'stats': stats
+        })
+    except ValueError as e:
+        return jsonify({
+            'status': 'error',
+            'message': f'查询参数无效: {str(e)}'
+        }), 400
+    except Exception as e:
+        logger.error(f"统计运行历史失败: {str(e)}")
+        return jsonify({
+            'status': 'error',
+            'message': str(e)
+        }), 500
+
 @app.route('/api/config', methods=['GET'])
 def get_config():
     """获取配置API"""
@@ -316,19 +534,13 @@ def save_config_api():
                 'message': '配置名称包含无效字符'
             }), 400
             
-        # 添加时间戳后缀以避免重名
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        filename = f"{safe_name}_{timestamp}.yaml"
-        
-        if save_config(config_data, filename):
-            # 同时更新主配置文件
-            with open(DEFAULT_CONFIG_PATH, 'w', encoding='utf-8') as f:
-                yaml.dump(config_data, f, allow_unicode=True)
-            
+        filename, deduplicated = save_config(config_data, safe_name)
+        if filename:
             return jsonify({
                 'status': 'success',
-                'message': '配置已保存',
-                'filename': filename
+                'message': '配置未变化，已复用已有配置' if deduplicated else '配置已保存',
+                'filename': filename,
+                'deduplicated': deduplicated
             })
         else:
             return jsonify({
@@ -343,12 +555,83 @@ def save_config_api():
 
 @app.route('/api/configs', methods=['GET'])
 def list_configs():
-    """列出所有保存的配置"""
-    configs = []
-    for filename in os.listdir(CONFIG_DIR):
-        if filename.endswith('.yaml'):
-            configs.append(filename)
-    return jsonify(configs)
+    """分页列出保存的配置，支持按名称搜索"""
+    try:
+        result = config_catalog.search(
+            query=request.args.get('q', '').strip(),
+            page=request.args.get('page', 1),
+            page_size=request.args.get('page_size', 50)
+        )
+        return jsonify({
+            'status': 'success',
+            **result
+        })
+    except ValueError as e:
+        return jsonify({
+            'status': 'error',
+            'message': f'查询参数无效: {str(e)}'
+        }), 400
+
+@app.route('/api/configs/prune', methods=['POST'])
+def prune_configs():
+    """按策略清理旧配置"""
+    try:
+        data = request.json or {}
+        keep_per_name = data.get('keep_per_name')
+        max_age_days = data.get('max_age_days')
+        max_total = data.get('max_total')
+        if keep_per_name is None and max_age_days is None and max_total is None:
+            return jsonify({
+                'status': 'error',
+                'message': '请至少指定一种清理策略'
+            }), 400
+        policy = {
+            'keep_per_name': int(keep_per_name) if keep_per_name is not None else None,
+            'max_age_days': float(max_age_days) if max_age_days is not None else None,
+            'max_total': int(max_total) if max_total is not None else None
+        }
+        if policy['keep_per_name'] is not None and policy['keep_per_name'] < 1:
+            return jsonify({
+                'status': 'error',
+                'message': 'keep_per_name 必须大于等于1'
+            }), 400
+        if policy['max_age_days'] is not None and not policy['max_age_days'] >= 0:
+            return jsonify({
+                'status': 'error',
+                'message': 'max_age_days 不能为负数'
+            }), 400
+        if policy['max_total'] is not None and policy['max_total'] < 1:
+            return jsonify({
+                'status': 'error',
+                'message': 'max_total 必须大于等于1'
+            }), 400
+        
+        # 会删除全部可清理配置时需要显式确认
+        if not data.get('confirm'):
+            candidates = config_catalog.prune(dry_run=True, **policy)
+            if candidates and len(candidates) >= config_catalog.prunable_count():
+                return jsonify({
+                    'status': 'error',
+                    'message': f'该策略将删除全部 {len(candidates)} 个配置，如确认请在请求中加入 "confirm": true',
+                    'would_remove': candidates
+                }), 400
+        removed = config_catalog.prune(**policy)
+        return jsonify({
+            'status': 'success',
+            'message': f'已清理 {len(removed)} 个配置',
+            'removed': removed
+        })
+    except (ValueError, TypeError) as e:
+        return jsonify({
+            'status': 'error',
+            'message': f'清理参数无效: {str(e)}'
+        }), 400
+    except Exception as e:
+        logger.error(f"清理配置失败: {str(e)}")
+        return jsonify({
+            'status': 'error',
+            'message': str(e)
+        }), 500
 
 @app.route('/api/config/load/<filename>', methods=['GET'])
 def load_saved_config(filename):
@@ -407,5 +690,35 @@ def apply_config():
             'message': str(e)
         }), 500
 
+def resume_monitor_from_snapshot():
+    """
+    Web界面启动时恢复监控
+
+    进程异常退出后，状态快照中会留下属于当前配置的监控进度或未发送的通知，
+    此时自动启动监控程序，由其从快照继续监控或重发通知。
+
+    Returns:
+        bool: 是否启动了监控程序
+    """
+    global monitor_thread
+    
+    if not os.path.exists(DEFAULT_CONFIG_PATH):
+        return False
+    try:
+        monitor = load_monitor_module().TrainingMonitor(config_path=DEFAULT_CONFIG_PATH)
+        if not monitor.has_resumable_state():
+            return False
+    except Exception as e:
+        logger.warning(f"检查状态快照失败，不自动恢复监控: {str(e)}")
+        return False
+    
+    logger.info("发现未完成的监控状态快照，自动恢复监控")
+    monitor_stop_event.clear()
+    monitor_thread = start_background(run_monitor)
+    broadcast_status_change('running')
+    return True
+
+resume_monitor_from_snapshot()
+
 if __name__ == '__main__':
     app.run(debug=True, port=5000) 
\ No newline at end of file
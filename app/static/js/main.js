@@ -77,7 +77,7 @@ async function saveConfigWithName() {
             // 关闭模态框
             const modal = bootstrap.Modal.getInstance(document.getElementById('saveConfigModal'));
             modal.hide();
-            alert('配置已保存');
+            alert(result.message);
         } else {
             alert('保存失败：' + result.message);
         }
@@ -86,30 +86,87 @@ async function saveConfigWithName() {
     }
 }
 
+// 配置列表分页状态
+const configListState = {
+    page: 1,
+    pageSize: 20,
+    query: '',
+    total: 0
+};
+let configSearchTimer = null;
+
 // 加载配置列表
 async function loadConfigList() {
+    configListState.page = 1;
+    configListState.query = '';
+    document.getElementById('configSearch').value = '';
+    await fetchConfigPage();
+    
+    const modal = bootstrap.Modal.getOrCreateInstance(document.getElementById('configListModal'));
+    modal.show();
+}
+
+// 获取一页配置并渲染
+async function fetchConfigPage() {
     try {
-        const response = await fetch('/api/configs');
-        const configs = await response.json();
-        
-        const configList = document.getElementById('configList');
-        configList.innerHTML = '';
-        
-        configs.forEach(filename => {
-            const li = document.createElement('li');
-            li.className = 'list-group-item';
-            li.textContent = filename;
-            li.onclick = () => loadConfig(filename);
-            configList.appendChild(li);
+        const params = new URLSearchParams({
+            page: configListState.page,
+            page_size: configListState.pageSize,
+            q: configListState.query
         });
-        
-        const modal = new bootstrap.Modal(document.getElementById('configListModal'));
-        modal.show();
+        const response = await fetch(`/api/configs?${params}`);
+        const result = await response.json();
+        if (result.status !== 'success') {
+            alert('加载配置列表失败：' + result.message);
+            return;
+        }
+        configListState.total = result.total;
+        renderConfigList(result.items);
     } catch (error) {
         alert('加载配置列表失败：' + error.message);
     }
 }
 
+// 渲染当前页的配置列表（一次性替换，避免逐条触发重排）
+function renderConfigList(items) {
+    const fragment = document.createDocumentFragment();
+    items.forEach(item => {
+        const li = document.createElement('li');
+        li.className = 'list-group-item d-flex justify-content-between align-items-center';
+        const name = document.createElement('span');
+        name.textContent = item.filename;
+        const time = document.createElement('small');
+        time.className = 'text-muted';
+        time.textContent = item.time;
+        li.append(name, time);
+        li.onclick = () => loadConfig(item.filename);
+        fragment.appendChild(li);
+    });
+    document.getElementById('configList').replaceChildren(fragment);
+    
+    const totalPages = Math.max(1, Math.ceil(configListState.total / configListState.pageSize));
+    document.getElementById('configPageInfo').textContent =
+        `第 ${configListState.page}/${totalPages} 页，共 ${configListState.total} 个`;
+    document.getElementById('configPrevBtn').disabled = configListState.page <= 1;
+    document.getElementById('configNextBtn').disabled = configListState.page >= totalPages;
+}
+
+// 翻页
+function changeConfigPage(delta) {
+    configListState.page = Math.max(1, configListState.page + delta);
+    fetchConfigPage();
+}
+
+// 搜索配置（输入停止300毫秒后再请求）
+function searchConfigs(query) {
+    clearTimeout(configSearchTimer);
+    configSearchTimer = setTimeout(() => {
+        configListState.query = query.trim();
+        configListState.page = 1;
+        fetchConfigPage();
+    }, 300);
+}
+
 // 加载指定配置
 async function loadConfig(filename) {
     try {
@@ -187,19 +244,180 @@ function initWebSocket() {
     };
 }
 
-// 添加日志到面板
+// 日志面板：环形缓冲保存最近的日志，虚拟滚动只渲染可见的行
+const LOG_CAPACITY = 50000;     // 最多保留的日志条数
+const LOG_ROW_HEIGHT = 20;      // 每行高度(px)，需与style.css中的.log-row一致
+const LOG_OVERSCAN = 10;        // 可见区域上下额外渲染的行数
+const LOG_LEVELS = {DEBUG: 10, INFO: 20, WARNING: 30, ERROR: 40, CRITICAL: 50};
+
+const logState = {
+    buffer: new Array(LOG_CAPACITY),
+    start: 0,           // 最旧日志在缓冲中的位置
+    count: 0,           // 缓冲中的日志条数
+    firstSeq: 0,        // 最旧日志的序号
+    filtered: [],       // 符合过滤条件的日志序号
+    filteredStart: 0,   // filtered中已被淘汰的前缀长度
+    minLevel: 0,
+    query: '',
+    renderPending: false,
+    stickToBottom: true,
+    rows: []            // 复用的行节点
+};
+let logSearchTimer = null;
+
+// 解析日志级别
+function parseLogLevel(message) {
+    const match = / - (DEBUG|INFO|WARNING|ERROR|CRITICAL) - /.exec(message);
+    return match ? match[1] : 'INFO';
+}
+
+// 判断日志是否符合当前过滤条件
+function matchesLogFilter(entry) {
+    if (LOG_LEVELS[entry.level] < logState.minLevel) {
+        return false;
+    }
+    if (logState.query) {
+        if (entry.lower === undefined) {
+            entry.lower = entry.text.toLowerCase();
+        }
+        return entry.lower.includes(logState.query);
+    }
+    return true;
+}
+
+// 按序号取出日志
+function getLogEntry(seq) {
+    return logState.buffer[(logState.start + seq - logState.firstSeq) % LOG_CAPACITY];
+}
+
+// 添加日志到面板（只写入缓冲，DOM在下一帧统一更新）
 function appendLog(message) {
+    const entry = {text: String(message), level: parseLogLevel(String(message))};
+    
+    if (logState.count === LOG_CAPACITY) {
+        // 缓冲已满，覆盖最旧的一条
+        logState.start = (logState.start + 1) % LOG_CAPACITY;
+        logState.firstSeq++;
+    } else {
+        logState.count++;
+    }
+    const seq = logState.firstSeq + logState.count - 1;
+    logState.buffer[(logState.start + logState.count - 1) % LOG_CAPACITY] = entry;
+    
+    // 丢弃已被淘汰日志的过滤结果，前缀过长时再整体压缩
+    const filtered = logState.filtered;
+    while (logState.filteredStart < filtered.length && filtered[logState.filteredStart] < logState.firstSeq) {
+        logState.filteredStart++;
+    }
+    if (logState.filteredStart > 4096 && logState.filteredStart * 2 > filtered.length) {
+        logState.filtered = filtered.slice(logState.filteredStart);
+        logState.filteredStart = 0;
+    }
+    if (matchesLogFilter(entry)) {
+        logState.filtered.push(seq);
+    }
+    scheduleLogRender();
+}
+
+// 过滤条件变化时重新计算匹配的日志（只遍历缓冲，不操作DOM）
+function rebuildLogFilter() {
+    const filtered = [];
+    for (let i = 0; i < logState.count; i++) {
+        const seq = logState.firstSeq + i;
+        if (matchesLogFilter(getLogEntry(seq))) {
+            filtered.push(seq);
+        }
+    }
+    logState.filtered = filtered;
+    logState.filteredStart = 0;
+    logState.stickToBottom = true;
+    scheduleLogRender();
+}
+
+// 按级别过滤日志
+function filterLogLevel(level) {
+    logState.minLevel = LOG_LEVELS[level] || 0;
+    rebuildLogFilter();
+}
+
+// 搜索日志（输入停止200毫秒后再过滤）
+function searchLogs(query) {
+    clearTimeout(logSearchTimer);
+    logSearchTimer = setTimeout(() => {
+        logState.query = query.trim().toLowerCase();
+        rebuildLogFilter();
+    }, 200);
+}
+
+// 合并同一帧内的多次更新
+function scheduleLogRender() {
+    if (!logState.renderPending) {
+        logState.renderPending = true;
+        requestAnimationFrame(renderLogs);
+    }
+}
+
+// 渲染可见区域内的日志行
+function renderLogs() {
+    logState.renderPending = false;
     const logPanel = document.getElementById('logPanel');
-    const logEntry = document.createElement('div');
-    logEntry.textContent = message;
-    logPanel.appendChild(logEntry);
-    logPanel.scrollTop = logPanel.scrollHeight;
+    const total = logState.filtered.length - logState.filteredStart;
+    
+    document.getElementById('logSpacer').style.height = `${total * LOG_ROW_HEIGHT}px`;
+    if (logState.stickToBottom) {
+        logPanel.scrollTop = logPanel.scrollHeight;
+    }
+    
+    const first = Math.max(0, Math.floor(logPanel.scrollTop / LOG_ROW_HEIGHT) - LOG_OVERSCAN);
+    const last = Math.min(total, Math.ceil((logPanel.scrollTop + logPanel.clientHeight) / LOG_ROW_HEIGHT) + LOG_OVERSCAN);
+    const rows = logState.rows;
+    
+    while (rows.length < last - first) {
+        const row = document.createElement('div');
+        row.className = 'log-row';
+        logPanel.appendChild(row);
+        rows.push(row);
+    }
+    
+    for (let i = 0; i < rows.length; i++) {
+        const row = rows[i];
+        const index = first + i;
+        if (index >= last) {
+            row.style.display = 'none';
+            row.dataset.seq = '';
+            continue;
+        }
+        const seq = logState.filtered[logState.filteredStart + index];
+        row.style.display = '';
+        row.style.transform = `translateY(${index * LOG_ROW_HEIGHT}px)`;
+        if (row.dataset.seq !== String(seq)) {
+            const entry = getLogEntry(seq);
+            row.textContent = entry.text;
+            row.title = entry.text;
+            row.className = `log-row log-${entry.level.toLowerCase()}`;
+            row.dataset.seq = seq;
+        }
+    }
+}
+
+// 用户滚动时记录是否停留在底部，并更新可见行
+function onLogScroll() {
+    const logPanel = document.getElementById('logPanel');
+    logState.stickToBottom = logPanel.scrollTop + logPanel.clientHeight >= logPanel.scrollHeight - LOG_ROW_HEIGHT;
+    scheduleLogRender();
 }
 
 // 清空日志
 function clearLogs() {
-    const logPanel = document.getElementById('logPanel');
-    logPanel.innerHTML = '';
+    // 序号继续递增，避免复用的行节点误认为内容未变化
+    logState.firstSeq += logState.count;
+    logState.buffer = new Array(LOG_CAPACITY);
+    logState.start = 0;
+    logState.count = 0;
+    logState.filtered = [];
+    logState.filteredStart = 0;
+    logState.stickToBottom = true;
+    scheduleLogRender();
 }
 
 // 更新监控状态
@@ -280,6 +498,7 @@ async function stopMonitor() {
 
 // 页面加载完成后初始化WebSocket
 document.addEventListener('DOMContentLoaded', function() {
+    document.getElementById('logPanel').addEventListener('scroll', onLogScroll, {passive: true});
     initWebSocket();
 });
 
@@ -0,0 +1,82 @@
+"""
+检查点目录检查开销测试
+
+在临时目录中生成大量文件，对比每次轮询的耗时：
+- inotify: CheckpointWatcher 通过inotify事件增量更新索引
+- mtime:   CheckpointWatcher 按目录修改时间判断是否需要重新列目录
+- naive:   每次调用glob并对所有匹配文件执行stat，作为参照
+
+用法：
+    python benchmarks/bench_checkpoint_watcher.py --files 50000 --polls 500
+"""
+import os
+import sys
+import glob
+import time
+import shutil
+import argparse
+import tempfile
+import statistics
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.checkpoint_watcher import CheckpointWatcher
+
+
+def make_tree(directory, files, checkpoints):
+    for i in range(files):
+        open(os.path.join(directory, f"sample_{i:06d}.npy"), 'wb').close()
+    for epoch in range(checkpoints):
+        with open(os.path.join(directory, f"ckpt_epoch_{epoch}.pth"), 'wb') as f:
+            f.write(b'\0' * 1024)
+    # 让目录修改时间离开"刚刚修改"的窗口
+    past = time.time() - 60
+    os.utime(directory, (past, past))
+
+
+def naive_poll(directory, min_epoch):
+    paths = glob.glob(os.path.join(directory, 'ckpt_epoch_*.pth'))
+    return [os.stat(p).st_size for p in paths
+            if int(os.path.basename(p)[len('ckpt_epoch_'):-len('.pth')]) >= min_epoch]
+
+
+def bench(name, func, polls):
+    func()
+    timings = []
+    for _ in range(polls):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    timings.sort()
+    print(f"{name:<8} 平均 {statistics.mean(timings) * 1e6:10.1f}us  "
+          f"p50 {timings[len(timings) // 2] * 1e6:10.1f}us  "
+          f"p99 {timings[int(len(timings) * 0.99)] * 1e6:10.1f}us")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="检查点目录检查开销测试")
+    parser.add_argument("--files", type=int, default=50000, help="目录中的其他文件数量")
+    parser.add_argument("--checkpoints", type=int, default=200, help="检查点文件数量")
+    parser.add_argument("--min-epoch", type=int, default=1000, help="最小轮次（默认不会满足，持续轮询）")
+    parser.add_argument("--polls", type=int, default=500, help="轮询次数")
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp(prefix='tasknya_ckpt_')
+    try:
+        make_tree(directory, args.files, args.checkpoints)
+        print(f"目录: {directory}，共 {args.files + args.checkpoints} 个文件")
+        for name, use_inotify in (('inotify', True), ('mtime', False)):
+            watcher = CheckpointWatcher(directory, 'ckpt_epoch_*.pth', min_epoch=args.min_epoch,
+                                        use_inotify=use_inotify)
+            start = time.perf_counter()
+            watcher.check()
+            print(f"{name:<8} 首次建立索引 {(time.perf_counter() - start) * 1e3:.1f}ms")
+            bench(name, watcher.check, args.polls)
+            watcher.close()
+        bench('naive', lambda: naive_poll(directory, args.min_epoch), args.polls)
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+主机资源采集开销测试
+
+对比每次采样的耗时和内存分配：
+- proc:   HostTelemetry 复用文件描述符读取 /proc
+- psutil: HostTelemetry 使用psutil（需要安装psutil）
+- naive:  每次重新打开文件并按文本整体解析，作为参照
+
+用法：
+    python benchmarks/bench_host_telemetry.py --samples 5000
+"""
+import os
+import sys
+import time
+import argparse
+import statistics
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.host_telemetry import HostTelemetry, psutil
+
+
+def naive_sample():
+    """每次重新打开并完整解析 /proc 文件"""
+    with open('/proc/stat', 'r') as f:
+        cpu = [int(v) for v in f.readline().split()[1:9]]
+    with open('/proc/meminfo', 'r') as f:
+        mem = {line.split(':')[0]: int(line.split()[1]) for line in f if ':' in line}
+    with open('/proc/diskstats', 'r') as f:
+        disk = sum(int(line.split()[5]) + int(line.split()[9]) for line in f if len(line.split()) > 9)
+    with open('/proc/net/dev', 'r') as f:
+        net = sum(int(line.split(':')[1].split()[0]) for line in f if ':' in line)
+    return cpu, mem, disk, net
+
+
+def bench(name, func, samples):
+    func()
+    timings = []
+    for _ in range(samples):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    func()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    allocated = sum(stat.size_diff for stat in after.compare_to(before, 'filename') if stat.size_diff > 0)
+
+    timings.sort()
+    print(f"{name:<8} 平均 {statistics.mean(timings) * 1e6:8.1f}us  "
+          f"p50 {timings[len(timings) // 2] * 1e6:8.1f}us  "
+          f"p99 {timings[int(len(timings) * 0.99)] * 1e6:8.1f}us  "
+          f"单次净分配 {allocated}B")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="主机资源采集开销测试")
+    parser.add_argument("--samples", type=int, default=2000, help="采样次数")
+    args = parser.parse_args()
+
+    if os.path.exists('/proc/stat'):
+        telemetry = HostTelemetry('proc')
+        bench('proc', telemetry.sample, args.samples)
+        telemetry.close()
+        bench('naive', naive_sample, args.samples)
+    if psutil is not None:
+        bench('psutil', HostTelemetry('psutil').sample, args.samples)
+    else:
+        print("未安装psutil，跳过psutil测试")
+
+
+if __name__ == "__main__":
+    main()
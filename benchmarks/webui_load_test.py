@@ -0,0 +1,237 @@
+"""
+TaskNya Web界面压测脚本
+
+同时建立大量WebSocket连接并持续请求REST接口，统计：
+- 成功建立的WebSocket连接数，以及测量窗口结束时仍同时保持的连接数
+- 每个连接收到的广播消息数
+- REST接口的吞吐量(请求/秒)和延迟分位数
+
+指定 --broadcast-path 时同时持续请求一个会写日志的接口，使服务端不断广播日志；
+配合 --stalled-clients 建立只握手、从不读取数据的连接，检查卡住的客户端
+是否会拖慢正常客户端接收广播。
+
+用法示例（单核限制下测试生产模式）：
+    taskset -c 0 python webui.py --server gevent --port 5000
+    python benchmarks/webui_load_test.py --url http://127.0.0.1:5000 --ws-clients 1000 --duration 30
+    python benchmarks/webui_load_test.py --ws-clients 200 --stalled-clients 20 \
+        --broadcast-path /api/config/load/default.yaml
+"""
+import argparse
+import base64
+import os
+import socket
+import statistics
+import threading
+import time
+from urllib.parse import urlsplit
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+import simple_websocket
+
+
+def hold_websocket(ws_url, window, stats, lock, attempted, start):
+    """
+    建立一个WebSocket连接，并在统一的测量窗口内持续接收消息
+
+    连接失败只计数，不影响其他连接；所有连接尝试结束后主线程才开始测量，
+    窗口结束时连接仍然可用的客户端计入同时保持的连接数。
+
+    Args:
+        ws_url (str): WebSocket地址
+        window (dict): 测量窗口，start 事件触发后包含 'deadline'
+        stats (dict): 汇总统计
+        lock (threading.Lock): 统计锁
+        attempted (threading.Semaphore): 每完成一次连接尝试释放一次
+        start (threading.Event): 测量开始事件
+    """
+    try:
+        ws = simple_websocket.Client(ws_url)
+    except Exception:
+        with lock:
+            stats['ws_failed'] += 1
+        attempted.release()
+        return
+
+    with lock:
+        stats['ws_connected'] += 1
+    attempted.release()
+    start.wait()
+
+    received = 0
+    deadline = window['deadline']
+    try:
+        while True:
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                break
+            if ws.receive(timeout=remaining) is not None:
+                received += 1
+        with lock:
+            stats['ws_open_at_end'] += 1
+            stats['ws_received'].append(received)
+    except Exception:
+        with lock:
+            stats['ws_dropped'] += 1
+    finally:
+        with lock:
+            stats['ws_messages'] += received
+        try:
+            ws.close()
+        except Exception:
+            pass
+
+
+def open_stalled_websocket(base_url):
+    """
+    建立一个只完成握手、之后从不读取数据的WebSocket连接
+
+    接收缓冲区设得很小，服务端发送的数据很快会堆积在服务端，模拟卡住的客户端。
+
+    Returns:
+        socket.socket: 已完成握手的连接，失败时为None
+    """
+    parts = urlsplit(base_url)
+    try:
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4096)
+        sock.settimeout(10)
+        sock.connect((parts.hostname, parts.port or 80))
+        key = base64.b64encode(os.urandom(16)).decode()
+        sock.sendall((f"GET /ws HTTP/1.1\r\nHost: {parts.netloc}\r\nUpgrade: websocket\r\n"
+                      f"Connection: Upgrade\r\nSec-WebSocket-Key: {key}\r\n"
+                      f"Sec-WebSocket-Version: 13\r\n\r\n").encode())
+        if not sock.recv(1024).startswith(b'HTTP/1.1 101'):
+            sock.close()
+            return None
+        return sock
+    except OSError:
+        return None
+
+
+def hammer_rest(url, deadline, latencies, lock):
+    """
+    在截止时间前循环请求REST接口
+
+    Args:
+        url (str): 请求地址
+        deadline (float): 截止时间戳
+        latencies (list): 成功请求的延迟(秒)
+        lock (threading.Lock): 统计锁
+
+    Returns:
+        int: 失败请求数
+    """
+    session = requests.Session()
+    errors = 0
+    local = []
+    while time.time() < deadline:
+        start = time.perf_counter()
+        try:
+            response = session.get(url, timeout=10)
+            if response.status_code == 200:
+                local.append(time.perf_counter() - start)
+            else:
+                errors += 1
+        except requests.RequestException:
+            errors += 1
+    with lock:
+        latencies.extend(local)
+    return errors
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="TaskNya Web界面压测")
+    parser.add_argument("--url", default="http://127.0.0.1:5000", help="Web界面地址")
+    parser.add_argument("--ws-clients", type=int, default=200, help="并发WebSocket连接数")
+    parser.add_argument("--rest-workers", type=int, default=8, help="并发REST请求线程数")
+    parser.add_argument("--rest-path", default="/api/monitor/status", help="压测的REST接口")
+    parser.add_argument("--duration", type=float, default=10.0, help="压测时长(秒)")
+    parser.add_argument("--stalled-clients", type=int, default=0, help="握手后从不读取数据的WebSocket连接数")
+    parser.add_argument("--broadcast-path", default=None,
+                        help="压测期间持续请求的、会产生日志广播的接口（如 /api/config/load/default.yaml）")
+    parser.add_argument("--connect-timeout", type=float, default=60.0, help="等待所有连接尝试完成的最长时间(秒)")
+    args = parser.parse_args()
+
+    base_url = args.url.rstrip('/')
+    ws_url = base_url.replace('http://', 'ws://', 1).replace('https://', 'wss://', 1) + '/ws'
+
+    lock = threading.Lock()
+    stats = {'ws_connected': 0, 'ws_failed': 0, 'ws_dropped': 0, 'ws_open_at_end': 0, 'ws_messages': 0,
+             'ws_received': []}
+    attempted = threading.Semaphore(0)
+    start = threading.Event()
+    window = {}
+
+    print(f"建立 {args.ws_clients} 个WebSocket连接: {ws_url}")
+    ws_threads = []
+    for _ in range(args.ws_clients):
+        t = threading.Thread(target=hold_websocket, args=(ws_url, window, stats, lock, attempted, start))
+        t.daemon = True
+        t.start()
+        ws_threads.append(t)
+
+    # 等待所有连接尝试结束（成功或失败），之后所有客户端共用同一个测量窗口
+    connect_deadline = time.time() + args.connect_timeout
+    pending = args.ws_clients
+    while pending and attempted.acquire(timeout=max(0, connect_deadline - time.time())):
+        pending -= 1
+    if pending:
+        print(f"{pending} 个连接在 {args.connect_timeout} 秒内未完成，不计入本次测量")
+    print(f"已连接 {stats['ws_connected']}，失败 {stats['ws_failed']}")
+
+    stalled = []
+    if args.stalled_clients:
+        stalled = [s for s in (open_stalled_websocket(base_url) for _ in range(args.stalled_clients)) if s]
+        print(f"已建立 {len(stalled)}/{args.stalled_clients} 个不读取数据的连接")
+
+    print(f"压测REST接口 {args.rest_path}，{args.rest_workers} 个并发，持续 {args.duration} 秒")
+    latencies = []
+    started = time.time()
+    deadline = started + args.duration
+    window['deadline'] = deadline
+    start.set()
+    broadcast_latencies = []
+    with ThreadPoolExecutor(max_workers=args.rest_workers + 1) as pool:
+        futures = [pool.submit(hammer_rest, base_url + args.rest_path, deadline, latencies, lock)
+                   for _ in range(args.rest_workers)]
+        if args.broadcast_path:
+            broadcast_future = pool.submit(hammer_rest, base_url + args.broadcast_path, deadline,
+                                           broadcast_latencies, lock)
+        rest_errors = sum(f.result() for f in futures)
+        broadcast_errors = broadcast_future.result() if args.broadcast_path else 0
+    elapsed = time.time() - started
+
+    for t in ws_threads:
+        t.join(timeout=args.duration + 10)
+    for s in stalled:
+        s.close()
+
+    print("\n===== 压测结果 =====")
+    print(f"WebSocket 已连接: {stats['ws_connected']}/{args.ws_clients}  "
+          f"失败: {stats['ws_failed']}  中途断开: {stats['ws_dropped']}  "
+          f"窗口结束时仍保持: {stats['ws_open_at_end']}  收到消息: {stats['ws_messages']}")
+    print(f"REST 成功请求: {len(latencies)}  失败: {rest_errors}  吞吐: {len(latencies) / elapsed:.1f} 请求/秒")
+    if latencies:
+        print(f"REST 延迟: 平均 {statistics.mean(latencies) * 1000:.2f}ms  "
+              f"p50 {percentile(latencies, 50) * 1000:.2f}ms  "
+              f"p95 {percentile(latencies, 95) * 1000:.2f}ms  "
+              f"p99 {percentile(latencies, 99) * 1000:.2f}ms")
+    if args.broadcast_path:
+        received = stats['ws_received']
+        print(f"广播请求 {args.broadcast_path}: 成功 {len(broadcast_latencies)}  失败: {broadcast_errors}")
+        if received:
+            print(f"正常客户端每连接收到消息: 平均 {statistics.mean(received):.1f}  "
+                  f"最少 {min(received)}  最多 {max(received)}")
+
+
+if __name__ == "__main__":
+    main()
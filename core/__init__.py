@@ -0,0 +1,5 @@
+"""
+TaskNya 监控核心组件
+
+供 main.py 的 TrainingMonitor 和 Web界面(app/app.py) 共同使用的功能模块。
+"""
@@ -0,0 +1,345 @@
+import os
+import re
+import time
+import errno
+import struct
+import fnmatch
+import logging
+
+logger = logging.getLogger(__name__)
+
+try:
+    import ctypes
+    import ctypes.util
+except ImportError:
+    ctypes = None
+
+# inotify 事件掩码（见 inotify(7)）
+_IN_MOVED_FROM = 0x00000040
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_DELETE = 0x00000200
+_IN_DELETE_SELF = 0x00000400
+_IN_MOVE_SELF = 0x00000800
+_IN_Q_OVERFLOW = 0x00004000
+_IN_IGNORED = 0x00008000
+_IN_ISDIR = 0x40000000
+_IN_NONBLOCK = 0o4000
+_IN_CLOEXEC = 0o2000000
+
+_WATCH_MASK = _IN_CREATE | _IN_MOVED_TO | _IN_MOVED_FROM | _IN_DELETE | _IN_DELETE_SELF | _IN_MOVE_SELF
+# 需要重新列目录的事件：队列溢出或被监视的目录本身被删除、移动
+_RESYNC_MASK = _IN_Q_OVERFLOW | _IN_DELETE_SELF | _IN_MOVE_SELF | _IN_IGNORED
+
+_EVENT_HEADER = struct.Struct('iIII')
+
+# 目录修改时间距当前不足该秒数时，同一时间粒度内可能还有未看到的变化，下次继续列目录
+_RACY_MTIME_SECONDS = 2.0
+
+_DIGITS = re.compile(r'\d+')
+
+
+class _Inotify:
+    """通过ctypes调用 inotify 监视单个目录的文件增删，不可用时 available 为False"""
+
+    def __init__(self, directory):
+        self.fd = None
+        if ctypes is None:
+            return
+        try:
+            libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+            fd = libc.inotify_init1(_IN_NONBLOCK | _IN_CLOEXEC)
+        except (OSError, AttributeError):
+            return
+        if fd < 0:
+            return
+        if libc.inotify_add_watch(fd, os.fsencode(directory), _WATCH_MASK) < 0:
+            os.close(fd)
+            return
+        self.fd = fd
+
+    @property
+    def available(self):
+        return self.fd is not None
+
+    def read_events(self):
+        """
+        读取所有待处理事件
+
+        Returns:
+            tuple: (新增文件名集合, 删除文件名集合, 是否需要重新列目录)
+        """
+        added, removed, resync = set(), set(), False
+        while True:
+            try:
+                data = os.read(self.fd, 65536)
+            except BlockingIOError:
+                break
+            except OSError as e:
+                if e.errno == errno.EINTR:
+                    continue
+                raise
+            pos = 0
+            while pos + _EVENT_HEADER.size <= len(data):
+                _, mask, _, length = _EVENT_HEADER.unpack_from(data, pos)
+                pos += _EVENT_HEADER.size
+                name = os.fsdecode(data[pos:pos + length].rstrip(b'\0'))
+                pos += length
+                if mask & _RESYNC_MASK:
+                    resync = True
+                if not name or mask & _IN_ISDIR:
+                    continue
+                if mask & (_IN_CREATE | _IN_MOVED_TO):
+                    added.add(name)
+                    removed.discard(name)
+                elif mask & (_IN_DELETE | _IN_MOVED_FROM):
+                    removed.add(name)
+                    added.discard(name)
+        return added, removed, resync
+
+    def close(self):
+        if self.fd is not None:
+            try:
+                os.close(self.fd)
+            except OSError:
+                pass
+            self.fd = None
+
+
+class CheckpointWatcher:
+    """
+    检查点目录监视
+
+    在目录中查找匹配模式的检查点文件（如 ckpt_epoch_{N}.pth），满足
+    "轮次 ≥ min_epoch 的文件数量达到 min_count，且文件大小已稳定" 时判定完成。
+
+    目录只在启动时完整列一次，之后的增删通过 inotify 事件（Linux）或
+    目录修改时间变化后的 os.scandir 增量更新索引；每次轮询只对尚未确认稳定的
+    候选文件调用 stat，开销与目录中的文件总数无关。
+    """
+
+    def __init__(self, directory, pattern, min_epoch=None, min_count=1, stable_checks=2, use_inotify=True):
+        """
+        初始化检查点目录监视
+
+        Args:
+            directory (str): 检查点所在目录
+            pattern (str): 文件名glob模式；以 're:' 开头时为正则表达式，
+                           轮次取命名分组 epoch 或第一个分组，否则取文件名中最后一段数字
+            min_epoch (int, optional): 只统计轮次不小于该值的文件
+            min_count (int): 需要的稳定文件数量
+            stable_checks (int): 文件大小和修改时间连续保持不变的检查次数
+            use_inotify (bool): 是否尝试使用inotify
+        """
+        self.directory = directory
+        self.pattern = pattern
+        self.min_epoch = min_epoch
+        self.min_count = max(1, int(min_count))
+        self.stable_checks = max(1, int(stable_checks))
+        self.use_inotify = use_inotify
+
+        if pattern.startswith('re:'):
+            self._regex = re.compile(pattern[3:])
+        else:
+            self._regex = re.compile(fnmatch.translate(pattern))
+
+        # 目录中的全部文件名，重新列目录时只处理差异部分
+        self._names = set()
+        # 匹配模式的文件名 -> 轮次（无法解析时为None）
+        self._matches = {}
+        # 候选文件名 -> [大小, 修改时间ns, 连续不变次数]
+        self._candidates = {}
+        self._dir_mtime = None
+        self._synced = False
+        self._inotify = None
+
+    def _epoch_of(self, name):
+        """
+        解析文件名，匹配模式时返回轮次
+
+        Returns:
+            tuple: (是否匹配, 轮次或None)
+        """
+        match = self._regex.fullmatch(name)
+        if not match:
+            return False, None
+        if 'epoch' in match.groupdict():
+            value = match.group('epoch')
+        elif match.groups():
+            value = match.group(1)
+        else:
+            digits = _DIGITS.findall(name)
+            value = digits[-1] if digits else None
+        try:
+            return True, int(value) if value is not None else None
+        except ValueError:
+            return True, None
+
+    def _is_candidate(self, epoch):
+        if self.min_epoch is None:
+            return True
+        return epoch is not None and epoch >= self.min_epoch
+
+    def _add(self, name):
+        self._names.add(name)
+        matched, epoch = self._epoch_of(name)
+        if not matched:
+            return
+        self._matches[name] = epoch
+        if self._is_candidate(epoch) and name not in self._candidates:
+            self._candidates[name] = [None, None, 0]
+
+    def _remove(self, name):
+        self._names.discard(name)
+        self._matches.pop(name, None)
+        self._candidates.pop(name, None)
+
+    def _full_sync(self):
+        """完整列一次目录，重建索引"""
+        names = set()
+        try:
+            with os.scandir(self.directory) as it:
+                for entry in it:
+                    names.add(entry.name)
+        except FileNotFoundError:
+            # 目录刚被删除，保持未同步状态，下次检查时重新列目录
+            return
+        for name in self._names - names:
+            self._remove(name)
+        for name in names - self._names:
+            self._add(name)
+        self._synced = True
+
+    def _sync(self):
+        """增量更新目录索引"""
+        if self.use_inotify and self._inotify is None:
+            watcher = _Inotify(self.directory)
+            if watcher.available:
+                # 先建立监视再列目录，两者之间的变化不会丢失
+                self._inotify = watcher
+                self._synced = False
+            elif not os.path.isdir(self.directory):
+                # 目录暂时不存在（被删除后尚未重新创建），下次检查时再尝试建立监视
+                return
+            else:
+                logger.debug("inotify不可用，改为按目录修改时间检测变化")
+                self.use_inotify = False
+
+        if self._inotify is not None:
+            if not self._synced:
+                self._full_sync()
+                return
+            added, removed, resync = self._inotify.read_events()
+            if resync:
+                # 目录被移动或删除时重新建立监视
+                self._inotify.close()
+                self._inotify = None
+                self._synced = False
+                self._sync()
+                return
+            for name in removed:
+                self._remove(name)
+            for name in added:
+                self._add(name)
+            return
+
+        try:
+            st = os.stat(self.directory)
+        except FileNotFoundError:
+            return
+        if self._synced and st.st_mtime_ns == self._dir_mtime:
+            return
+        self._full_sync()
+        if time.time() - st.st_mtime_ns / 1e9 < _RACY_MTIME_SECONDS:
+            self._dir_mtime = None
+        else:
+            self._dir_mtime = st.st_mtime_ns
+
+    def _refresh_candidates(self):
+        """
+        更新候选文件的稳定计数
+
+        Returns:
+            int: 已确认稳定的文件数量
+        """
+        stable = 0
+        for name, record in list(self._candidates.items()):
+            if record[2] >= self.stable_checks:
+                stable += 1
+                continue
+            try:
+                st = os.stat(os.path.join(self.directory, name))
+            except FileNotFoundError:
+                self._remove(name)
+                continue
+            if st.st_size > 0 and record[0] == st.st_size and record[1] == st.st_mtime_ns:
+                record[2] += 1
+            else:
+                record[0], record[1], record[2] = st.st_size, st.st_mtime_ns, 0
+            if record[2] >= self.stable_checks:
+                logger.info(f"检查点文件已稳定: {name} ({st.st_size} 字节)")
+                stable += 1
+        return stable
+
+    def check(self):
+        """
+        执行一次检查
+
+        Returns:
+            bool: 稳定的候选文件数量是否达到 min_count
+        """
+        if not os.path.isdir(self.directory):
+            return False
+        self._sync()
+        return self._refresh_candidates() >= self.min_count
+
+    def summary(self):
+        """
+        当前索引概况
+
+        Returns:
+            dict: matched（匹配模式的文件数）、candidates（满足轮次条件的文件数）、
+                  stable（已稳定的文件数）、latest_epoch（最大轮次）
+        """
+        epochs = [epoch for epoch in self._matches.values() if epoch is not None]
+        return {
+            'matched': len(self._matches),
+            'candidates': len(self._candidates),
+            'stable': sum(1 for record in self._candidates.values() if record[2] >= self.stable_checks),
+            'latest_epoch': max(epochs) if epochs else None,
+        }
+
+    def close(self):
+        """释放inotify文件描述符"""
+        if self._inotify is not None:
+            self._inotify.close()
+            self._inotify = None
+            self._synced = False
+
+    def get_state(self):
+        """
+        导出候选文件的稳定进度，用于状态快照
+
+        Returns:
+            dict: 可JSON序列化的状态
+        """
+        return {
+            'directory': self.directory,
+            'pattern': self.pattern,
+            'candidates': self._candidates,
+        }
+
+    def set_state(self, state):
+        """
+        从状态快照恢复稳定进度
+
+        文件列表在下一次检查时重新建立；恢复的文件需要再确认一次大小未变化才视为稳定。
+
+        Args:
+            state (dict): get_state() 导出的状态
+        """
+        if not state or state.get('directory') != self.directory or state.get('pattern') != self.pattern:
+            return
+        for name, record in (state.get('candidates') or {}).items():
+            if len(record) == 3:
+                self._candidates[name] = [record[0], record[1], min(record[2], self.stable_checks - 1)]
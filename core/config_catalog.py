@@ -0,0 +1,316 @@
+import os
+import re
+import json
+import time
+import hashlib
+import logging
+import tempfile
+import threading
+from datetime import datetime
+
+import yaml
+
+logger = logging.getLogger(__name__)
+
+INDEX_FILENAME = ".catalog.json"
+
+# 保存时每个配置名称自动保留的历史版本数，0表示不自动清理（由 prune() 显式清理）
+DEFAULT_KEEP_PER_NAME = 0
+
+# 分页大小上限
+MAX_PAGE_SIZE = 200
+
+# 保存时生成的文件名格式: <name>_<YYYYmmdd_HHMMSS>.yaml
+_FILENAME_PATTERN = re.compile(r"^(?P<name>.+)_(?P<ts>\d{8}_\d{6})(?:_\d+)?\.yaml$")
+
+
+def _hash_content(content):
+    return hashlib.sha256(content).hexdigest()
+
+
+class ConfigCatalog:
+    """
+    已保存配置的索引目录
+
+    在配置目录下维护 .catalog.json 索引（名称、时间、内容哈希、大小、修改时间），
+    列表、搜索和分页都直接基于内存中的索引完成，不再每次调用 os.listdir。
+    只有目录的修改时间变化（例如手动拷入配置文件）时才重新列目录；
+    保存生成的带时间戳文件写入后不再修改，只有不符合该命名格式、可能被原地覆盖的文件
+    （如 default.yaml）才逐个比较修改时间和大小，变化时重新计算哈希。
+    相同名称下内容完全相同的保存会复用已有文件，不会产生重复版本。
+    """
+
+    def __init__(self, config_dir, keep_per_name=DEFAULT_KEEP_PER_NAME, protected=('default.yaml',)):
+        """
+        初始化配置目录索引
+
+        Args:
+            config_dir (str): 配置文件目录
+            keep_per_name (int): 保存时每个名称自动保留的版本数，默认0表示不自动删除
+            protected (tuple): 不会被清理的文件名
+        """
+        self.config_dir = config_dir
+        self.keep_per_name = keep_per_name
+        self.protected = set(protected)
+        self.index_path = os.path.join(config_dir, INDEX_FILENAME)
+        self._lock = threading.RLock()
+        self._entries = {}
+        # 不符合保存文件命名格式、可能被原地覆盖的文件名，索引中新增文件时重新计算
+        self._mutable = None
+        self._dir_mtime = None
+        self._load_index()
+
+    def _load_index(self):
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            self._entries = {entry['filename']: entry for entry in data.get('entries', [])}
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.warning(f"配置索引损坏，重新建立: {str(e)}")
+            self._entries = {}
+
+    def _write_index(self):
+        """原子写入索引文件，并记录写入后的目录修改时间"""
+        fd, tmp_path = tempfile.mkstemp(prefix='.catalog_', dir=self.config_dir)
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump({'entries': list(self._entries.values())}, f, ensure_ascii=False, separators=(',', ':'))
+            os.replace(tmp_path, self.index_path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        # 索引文件本身也在目录中，写入后目录修改时间会变化
+        self._dir_mtime = os.stat(self.config_dir).st_mtime_ns
+
+    def _make_entry(self, filename):
+        path = os.path.join(self.config_dir, filename)
+        # 先取修改时间再读内容，读取期间文件被改写时下次对账会再次更新
+        st = os.stat(path)
+        with open(path, 'rb') as f:
+            content = f.read()
+        match = _FILENAME_PATTERN.match(filename)
+        name, timestamp = filename[:-len('.yaml')], st.st_mtime
+        if match:
+            try:
+                timestamp = datetime.strptime(match.group('ts'), '%Y%m%d_%H%M%S').timestamp()
+                name = match.group('name')
+            except ValueError:
+                # 形如时间戳但日期无效（手动命名的文件），按普通文件处理
+                pass
+        return {
+            'filename': filename,
+            'name': name,
+            'timestamp': timestamp,
+            'hash': _hash_content(content),
+            'size': st.st_size,
+            'mtime_ns': st.st_mtime_ns,
+        }
+
+    def _sync(self):
+        """
+        与磁盘对账
+
+        目录修改时间变化时（进程启动后第一次调用时总会）列目录，处理新增和删除的文件；
+        不符合保存文件命名格式的文件逐个比较修改时间和大小，被原地覆盖时重新计算哈希。
+        """
+        try:
+            dir_mtime = os.stat(self.config_dir).st_mtime_ns
+        except FileNotFoundError:
+            return
+
+        changed = False
+        fresh = set()
+        if dir_mtime != self._dir_mtime:
+            on_disk = {name for name in os.listdir(self.config_dir) if name.endswith('.yaml')}
+            for filename in set(self._entries) - on_disk:
+                del self._entries[filename]
+                changed = True
+            for filename in on_disk - set(self._entries):
+                try:
+                    self._entries[filename] = self._make_entry(filename)
+                    fresh.add(filename)
+                    changed = True
+                except OSError as e:
+                    logger.warning(f"索引配置文件失败 {filename}: {str(e)}")
+            if fresh:
+                self._mutable = None
+
+        if self._mutable is None:
+            self._mutable = {f for f in self._entries if not _FILENAME_PATTERN.match(f)}
+        for filename in list(self._mutable):
+            entry = self._entries.get(filename)
+            if entry is None or filename in fresh:
+                continue
+            try:
+                st = os.stat(os.path.join(self.config_dir, filename))
+            except FileNotFoundError:
+                del self._entries[filename]
+                changed = True
+                continue
+            except OSError:
+                continue
+            if entry.get('mtime_ns') != st.st_mtime_ns or entry.get('size') != st.st_size:
+                try:
+                    self._entries[filename] = self._make_entry(filename)
+                    changed = True
+                except OSError as e:
+                    logger.warning(f"索引配置文件失败 {filename}: {str(e)}")
+        if changed:
+            self._write_index()
+        else:
+            self._dir_mtime = dir_mtime
+
+    def save(self, name, config_data):
+        """
+        保存配置
+
+        Args:
+            name (str): 配置名称（已清理过的安全名称）
+            config_data (dict): 配置内容
+
+        Returns:
+            tuple: (文件名, 是否复用了内容相同的已有文件)
+        """
+        content = yaml.dump(config_data, allow_unicode=True).encode('utf-8')
+        content_hash = _hash_content(content)
+        with self._lock:
+            self._sync()
+            for entry in self._entries.values():
+                if entry['name'] == name and entry['hash'] == content_hash:
+                    # 内容未变化，只更新时间
+                    entry['timestamp'] = time.time()
+                    self._write_index()
+                    return entry['filename'], True
+
+            timestamp = datetime.now()
+            filename = f"{name}_{timestamp.strftime('%Y%m%d_%H%M%S')}.yaml"
+            suffix = 1
+            while filename in self._entries or os.path.exists(os.path.join(self.config_dir, filename)):
+                filename = f"{name}_{timestamp.strftime('%Y%m%d_%H%M%S')}_{suffix}.yaml"
+                suffix += 1
+            path = os.path.join(self.config_dir, filename)
+            with open(path, 'wb') as f:
+                f.write(content)
+            st = os.stat(path)
+            self._entries[filename] = {
+                'filename': filename,
+                'name': name,
+                'timestamp': timestamp.timestamp(),
+                'hash': content_hash,
+                'size': st.st_size,
+                'mtime_ns': st.st_mtime_ns,
+            }
+            if self.keep_per_name:
+                self._prune(keep_per_name=self.keep_per_name, names={name})
+            self._write_index()
+            return filename, False
+
+    def search(self, query=None, page=1, page_size=50):
+        """
+        分页列出配置，按保存时间倒序
+
+        Args:
+            query (str, optional): 按名称或文件名搜索（不区分大小写）
+            page (int): 页码，从1开始
+            page_size (int): 每页条数
+
+        Returns:
+            dict: {'items': [...], 'total': int, 'page': int, 'page_size': int}
+        """
+        page = max(1, int(page))
+        page_size = max(1, min(int(page_size), MAX_PAGE_SIZE))
+        with self._lock:
+            self._sync()
+            entries = list(self._entries.values())
+        if query:
+            query = query.lower()
+            entries = [e for e in entries if query in e['filename'].lower()]
+        entries.sort(key=lambda e: e['timestamp'], reverse=True)
+        start = (page - 1) * page_size
+        items = []
+        for entry in entries[start:start + page_size]:
+            item = dict(entry)
+            item['time'] = datetime.fromtimestamp(entry['timestamp']).strftime('%Y-%m-%d %H:%M:%S')
+            items.append(item)
+        return {
+            'items': items,
+            'total': len(entries),
+            'page': page,
+            'page_size': page_size,
+        }
+
+    def prunable_count(self):
+        """
+        可被清理的配置数量
+
+        Returns:
+            int: 索引中不受保护的配置文件数
+        """
+        with self._lock:
+            self._sync()
+            return sum(1 for filename in self._entries if filename not in self.protected)
+
+    def prune(self, keep_per_name=None, max_age_days=None, max_total=None, dry_run=False):
+        """
+        按策略清理旧配置
+
+        Args:
+            keep_per_name (int, optional): 每个名称保留的最新版本数
+            max_age_days (float, optional): 删除早于该天数的配置
+            max_total (int, optional): 最多保留的配置总数
+            dry_run (bool): 为True时只返回将被删除的文件名，不实际删除
+
+        Returns:
+            list: 被删除（或将被删除）的文件名
+        """
+        with self._lock:
+            self._sync()
+            if dry_run:
+                return sorted(self._select_prune(keep_per_name=keep_per_name, max_age_days=max_age_days,
+                                                 max_total=max_total))
+            removed = self._prune(keep_per_name=keep_per_name, max_age_days=max_age_days, max_total=max_total)
+            if removed:
+                self._write_index()
+            return removed
+
+    def _select_prune(self, keep_per_name=None, max_age_days=None, max_total=None, names=None):
+        """按策略选出需要删除的文件名"""
+        entries = sorted((e for e in self._entries.values() if e['filename'] not in self.protected),
+                         key=lambda e: e['timestamp'], reverse=True)
+        doomed = set()
+        if keep_per_name:
+            seen = {}
+            for entry in entries:
+                if names is not None and entry['name'] not in names:
+                    continue
+                seen[entry['name']] = seen.get(entry['name'], 0) + 1
+                if seen[entry['name']] > keep_per_name:
+                    doomed.add(entry['filename'])
+        if max_age_days is not None:
+            cutoff = time.time() - float(max_age_days) * 86400
+            doomed.update(e['filename'] for e in entries if e['timestamp'] < cutoff)
+        if max_total is not None:
+            kept = [e for e in entries if e['filename'] not in doomed]
+            doomed.update(e['filename'] for e in kept[int(max_total):])
+        return doomed
+
+    def _prune(self, keep_per_name=None, max_age_days=None, max_total=None, names=None):
+        doomed = self._select_prune(keep_per_name=keep_per_name, max_age_days=max_age_days,
+                                    max_total=max_total, names=names)
+        removed = []
+        for filename in doomed:
+            try:
+                os.remove(os.path.join(self.config_dir, filename))
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                logger.error(f"删除配置文件失败 {filename}: {str(e)}")
+                continue
+            del self._entries[filename]
+            removed.append(filename)
+        if removed:
+            logger.info(f"已清理 {len(removed)} 个旧配置")
+        return sorted(removed)
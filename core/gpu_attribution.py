@@ -0,0 +1,263 @@
+import os
+import time
+import logging
+import subprocess
+
+logger = logging.getLogger(__name__)
+
+try:
+    import pynvml
+except ImportError:
+    pynvml = None
+
+
+class GpuJobAttributor:
+    """
+    任务GPU归属识别
+
+    根据任务的进程树（根进程PID、cgroup或进程名）与GPU上运行的计算进程做匹配，
+    得到当前任务实际占用的GPU编号。结果带缓存，按 refresh_interval 增量刷新：
+    进程树只从已知进程向下扩展，不再每次遍历整个 /proc。
+
+    任务结束后进程会从GPU上消失，此时保留最近一次识别到的GPU，
+    使功耗检查仍然针对任务原先使用的GPU。
+    """
+
+    def __init__(self, pid=None, cgroup=None, process_name=None, refresh_interval=30):
+        """
+        初始化GPU归属识别
+
+        Args:
+            pid (int, optional): 任务根进程PID，子进程会被自动纳入
+            cgroup (str, optional): 任务所在cgroup目录，如 /sys/fs/cgroup/slurm/job_123
+            process_name (str, optional): 命令行中包含此字符串的进程视为任务进程
+            refresh_interval (float): 缓存刷新间隔(秒)
+        """
+        self.root_pid = int(pid) if pid else None
+        self.cgroup = cgroup
+        self.process_name = process_name
+        self.refresh_interval = refresh_interval
+
+        self._pids = set()
+        self._gpu_ids = None
+        self._last_refresh = 0.0
+        self._uuid_to_index = None
+        self._nvml_ready = False
+
+    @property
+    def configured(self):
+        """是否配置了任何任务识别方式"""
+        return bool(self.root_pid or self.cgroup or self.process_name)
+
+    def get_gpu_ids(self, force=False):
+        """
+        获取任务占用的GPU编号
+
+        Args:
+            force (bool): 忽略缓存立即刷新
+
+        Returns:
+            list: GPU编号列表，尚未识别到任务GPU时返回None
+        """
+        now = time.monotonic()
+        if not force and self._gpu_ids and now - self._last_refresh < self.refresh_interval:
+            return self._gpu_ids
+
+        self._last_refresh = now
+        pids = self._refresh_pids()
+        if not pids:
+            logger.debug("未找到任务进程，沿用上次识别的GPU")
+            return self._gpu_ids
+
+        gpu_ids = set()
+        for pid, indices in self._query_compute_apps().items():
+            if pid in pids:
+                gpu_ids.update(indices)
+
+        if gpu_ids:
+            gpu_ids = sorted(gpu_ids)
+            if gpu_ids != self._gpu_ids:
+                logger.info(f"识别到任务占用的GPU: {gpu_ids}")
+            self._gpu_ids = gpu_ids
+        return self._gpu_ids
+
+    def get_state(self):
+        """
+        导出识别结果，用于状态快照
+
+        Returns:
+            dict: 可JSON序列化的识别状态
+        """
+        return {
+            'pids': sorted(self._pids),
+            'gpu_ids': self._gpu_ids,
+        }
+
+    def set_state(self, state):
+        """
+        从状态快照恢复识别结果
+
+        Args:
+            state (dict): get_state() 导出的状态
+        """
+        self._pids = set(state.get('pids') or [])
+        self._gpu_ids = state.get('gpu_ids')
+
+    def _refresh_pids(self):
+        """
+        增量刷新任务进程集合
+
+        Returns:
+            set: 当前存活的任务进程PID
+        """
+        candidates = set(self._pids)
+        if self.root_pid:
+            candidates.add(self.root_pid)
+        if self.cgroup:
+            candidates.update(self._read_cgroup_pids())
+        if self.process_name:
+            candidates.update(self._find_pids_by_name())
+
+        alive = {pid for pid in candidates if os.path.exists(f"/proc/{pid}")}
+
+        # 从已知进程向下扩展子进程（如DataLoader worker、torchrun启动的子进程）
+        children_map = None
+        frontier = list(alive)
+        while frontier:
+            pid = frontier.pop()
+            children = self._read_children(pid)
+            if children is None:
+                if children_map is None:
+                    children_map = self._build_children_map()
+                children = children_map.get(pid, ())
+            for child in children:
+                if child not in alive:
+                    alive.add(child)
+                    frontier.append(child)
+
+        self._pids = alive
+        return alive
+
+    @staticmethod
+    def _read_children(pid):
+        """读取 /proc/<pid>/task/*/children，内核不支持时返回None"""
+        children = set()
+        try:
+            tids = os.listdir(f"/proc/{pid}/task")
+        except OSError:
+            return children
+        for tid in tids:
+            try:
+                with open(f"/proc/{pid}/task/{tid}/children", 'r') as f:
+                    children.update(int(c) for c in f.read().split())
+            except FileNotFoundError:
+                if not os.path.exists(f"/proc/{pid}/task/{tid}"):
+                    continue
+                return None
+            except OSError:
+                continue
+        return children
+
+    @staticmethod
+    def _build_children_map():
+        """扫描 /proc/*/stat 构建父进程到子进程的映射"""
+        children_map = {}
+        for entry in os.listdir("/proc"):
+            if not entry.isdigit():
+                continue
+            try:
+                with open(f"/proc/{entry}/stat", 'r') as f:
+                    stat = f.read()
+            except OSError:
+                continue
+            # 进程名可能包含空格和括号，从最后一个')'之后解析
+            fields = stat[stat.rfind(')') + 2:].split()
+            if len(fields) > 1:
+                children_map.setdefault(int(fields[1]), []).append(int(entry))
+        return children_map
+
+    def _read_cgroup_pids(self):
+        """读取cgroup及其子cgroup中的所有进程"""
+        pids = set()
+        for root, _, files in os.walk(self.cgroup):
+            if 'cgroup.procs' not in files:
+                continue
+            try:
+                with open(os.path.join(root, 'cgroup.procs'), 'r') as f:
+                    pids.update(int(line) for line in f if line.strip())
+            except OSError:
+                continue
+        return pids
+
+    def _find_pids_by_name(self):
+        """查找命令行中包含 process_name 的进程"""
+        pids = set()
+        needle = self.process_name.encode('utf-8')
+        self_pid = os.getpid()
+        for entry in os.listdir("/proc"):
+            if not entry.isdigit() or int(entry) == self_pid:
+                continue
+            try:
+                with open(f"/proc/{entry}/cmdline", 'rb') as f:
+                    if needle in f.read().replace(b'\0', b' '):
+                        pids.add(int(entry))
+            except OSError:
+                continue
+        return pids
+
+    def _query_compute_apps(self):
+        """
+        查询GPU上运行的计算进程
+
+        优先使用NVML（需要安装nvidia-ml-py3），否则调用nvidia-smi。
+
+        Returns:
+            dict: PID到GPU编号集合的映射
+        """
+        if pynvml is not None:
+            try:
+                return self._query_compute_apps_nvml()
+            except Exception as e:
+                logger.debug(f"NVML查询计算进程失败，改用nvidia-smi: {str(e)}")
+
+        try:
+            if self._uuid_to_index is None:
+                output = subprocess.check_output(
+                    ['nvidia-smi', '--query-gpu=index,uuid', '--format=csv,noheader,nounits'],
+                    universal_newlines=True
+                )
+                self._uuid_to_index = {}
+                for line in output.strip().split('\n'):
+                    if ',' in line:
+                        idx, uuid = line.split(',', 1)
+                        self._uuid_to_index[uuid.strip()] = int(idx.strip())
+
+            output = subprocess.check_output(
+                ['nvidia-smi', '--query-compute-apps=pid,gpu_uuid', '--format=csv,noheader,nounits'],
+                universal_newlines=True
+            )
+        except (subprocess.SubprocessError, FileNotFoundError):
+            logger.warning("未检测到NVIDIA显卡或nvidia-smi不可用")
+            return {}
+
+        apps = {}
+        for line in output.strip().split('\n'):
+            if ',' not in line:
+                continue
+            pid, uuid = line.split(',', 1)
+            index = self._uuid_to_index.get(uuid.strip())
+            if index is not None and pid.strip().isdigit():
+                apps.setdefault(int(pid.strip()), set()).add(index)
+        return apps
+
+    def _query_compute_apps_nvml(self):
+        if not self._nvml_ready:
+            pynvml.nvmlInit()
+            self._nvml_ready = True
+
+        apps = {}
+        for index in range(pynvml.nvmlDeviceGetCount()):
+            handle = pynvml.nvmlDeviceGetHandleByIndex(index)
+            for proc in pynvml.nvmlDeviceGetComputeRunningProcesses(handle):
+                apps.setdefault(proc.pid, set()).add(index)
+        return apps
@@ -0,0 +1,286 @@
+import os
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+# 读取 /proc 文件的缓冲大小
+_READ_SIZE = 1 << 16
+# /proc 文件按整行返回，读到的数据距缓冲区末尾不足一页时可能还有剩余内容
+_PAGE_SIZE = 4096
+
+# 不计入磁盘IO的虚拟块设备
+_IGNORED_DISK_PREFIXES = (b'loop', b'ram', b'zram', b'fd', b'sr')
+
+_SECTOR_SIZE = 512
+
+
+class _ProcFile:
+    """长期打开的 /proc 文件，每次通过 pread 从头读取，避免重复 open/close"""
+
+    def __init__(self, path):
+        self.path = path
+        self.fd = os.open(path, os.O_RDONLY)
+        self.size = _READ_SIZE
+
+    def read(self):
+        # 一次从头读完保证内容一致；缓冲区可能不够时加倍后重读，并记住新的大小
+        while True:
+            data = os.pread(self.fd, self.size, 0)
+            if len(data) <= self.size - _PAGE_SIZE:
+                return data
+            self.size *= 2
+
+    def close(self):
+        try:
+            os.close(self.fd)
+        except OSError:
+            pass
+
+
+class HostTelemetry:
+    """
+    主机资源采集（CPU、内存、磁盘、网络）
+
+    Linux下直接读取 /proc/stat、/proc/meminfo、/proc/diskstats 和 /proc/net/dev：
+    文件描述符只打开一次，首次读取时记下所需字段所在的行号，之后只解析这些行。
+    其他平台或指定 backend='psutil' 时使用psutil（需要单独安装）。
+
+    速率类指标（CPU占用、磁盘和网络吞吐）由相邻两次采样计算，第一次采样时为None。
+    """
+
+    def __init__(self, backend='auto'):
+        """
+        初始化主机资源采集
+
+        Args:
+            backend (str): 'auto'、'proc' 或 'psutil'
+
+        Raises:
+            RuntimeError: 指定的采集方式在当前环境不可用
+        """
+        if backend == 'auto':
+            backend = 'proc' if os.path.exists('/proc/stat') else 'psutil'
+        if backend == 'psutil' and psutil is None:
+            raise RuntimeError("未安装psutil，无法采集主机资源")
+        if backend not in ('proc', 'psutil'):
+            raise RuntimeError(f"未知的主机资源采集方式: {backend}")
+
+        self.backend = backend
+        self._files = {}
+        self._meminfo_lines = None
+        self._disk_lines = None
+        self._net_lines = None
+        self._prev = None
+        self.last_sample = None
+
+        if backend == 'proc':
+            for name in ('stat', 'meminfo', 'diskstats', 'net/dev'):
+                self._files[name] = _ProcFile(f'/proc/{name}')
+
+    def close(self):
+        """关闭打开的 /proc 文件"""
+        for f in self._files.values():
+            f.close()
+        self._files = {}
+
+    def sample(self):
+        """
+        采集一次主机资源
+
+        Returns:
+            dict: cpu_percent、iowait_percent、mem_percent、mem_available_mb、
+                  disk_read_bps、disk_write_bps、net_rx_bps、net_tx_bps
+        """
+        now = time.monotonic()
+        if self.backend == 'proc':
+            counters = self._read_proc()
+        else:
+            counters = self._read_psutil()
+
+        result = {
+            'mem_percent': counters['mem_percent'],
+            'mem_available_mb': counters['mem_available_kb'] / 1024.0,
+            'cpu_percent': None,
+            'iowait_percent': None,
+            'disk_read_bps': None,
+            'disk_write_bps': None,
+            'net_rx_bps': None,
+            'net_tx_bps': None,
+        }
+        prev = self._prev
+        if prev is not None:
+            elapsed = now - prev[0]
+            prev_counters = prev[1]
+            cpu_total = counters['cpu_total'] - prev_counters['cpu_total']
+            if cpu_total > 0:
+                result['cpu_percent'] = 100.0 * (1 - (counters['cpu_idle'] - prev_counters['cpu_idle']) / cpu_total)
+                result['iowait_percent'] = 100.0 * (counters['cpu_iowait'] - prev_counters['cpu_iowait']) / cpu_total
+            if elapsed > 0:
+                for key in ('disk_read', 'disk_write', 'net_rx', 'net_tx'):
+                    result[f'{key}_bps'] = max(0, counters[key] - prev_counters[key]) / elapsed
+        self._prev = (now, counters)
+        self.last_sample = result
+        return result
+
+    def _read_proc(self):
+        counters = {}
+
+        # /proc/stat 第一行: cpu user nice system idle iowait irq softirq steal
+        data = self._files['stat'].read()
+        fields = data[:data.index(b'\n')].split()
+        values = [int(v) for v in fields[1:9]]
+        counters['cpu_total'] = sum(values)
+        counters['cpu_idle'] = values[3] + values[4]
+        counters['cpu_iowait'] = values[4]
+
+        lines = self._files['meminfo'].read().split(b'\n')
+        if self._meminfo_lines is None:
+            self._meminfo_lines = {}
+            for i, line in enumerate(lines):
+                key = line.split(b':', 1)[0]
+                if key in (b'MemTotal', b'MemAvailable', b'MemFree'):
+                    self._meminfo_lines[key] = i
+        mem = {key: int(lines[i].split()[1]) for key, i in self._meminfo_lines.items()}
+        total = mem.get(b'MemTotal', 0)
+        available = mem.get(b'MemAvailable', mem.get(b'MemFree', 0))
+        counters['mem_available_kb'] = available
+        counters['mem_percent'] = 100.0 * (total - available) / total if total else 0.0
+
+        lines = self._files['diskstats'].read().split(b'\n')
+        if not self._lines_valid(lines, self._disk_lines, 2):
+            self._disk_lines = (len(lines), self._locate_disks(lines))
+        read_sectors = write_sectors = 0
+        for i in self._disk_lines[1]:
+            fields = lines[i].split()
+            read_sectors += int(fields[5])
+            write_sectors += int(fields[9])
+        counters['disk_read'] = read_sectors * _SECTOR_SIZE
+        counters['disk_write'] = write_sectors * _SECTOR_SIZE
+
+        lines = self._files['net/dev'].read().split(b'\n')
+        if not self._lines_valid(lines, self._net_lines, None):
+            self._net_lines = (len(lines), self._locate_interfaces(lines))
+        rx = tx = 0
+        for i in self._net_lines[1]:
+            fields = lines[i].split(b':', 1)[1].split()
+            rx += int(fields[0])
+            tx += int(fields[8])
+        counters['net_rx'] = rx
+        counters['net_tx'] = tx
+        return counters
+
+    @staticmethod
+    def _lines_valid(lines, cached, name_field):
+        """
+        检查缓存的行号是否仍对应同一设备（设备增减时重新定位）
+
+        Args:
+            lines (list): 本次读取的所有行
+            cached (tuple): (定位时的总行数, {行号: 设备名})
+            name_field (int): 设备名所在的字段序号，None表示按冒号前的内容取设备名
+        """
+        if cached is None:
+            return False
+        line_count, located = cached
+        # 新设备追加在末尾时已缓存的行不变，需要比较总行数才能发现
+        if len(lines) != line_count:
+            return False
+        for i, name in located.items():
+            if i >= len(lines):
+                return False
+            line = lines[i]
+            if name_field is not None:
+                fields = line.split()
+                # 设备减少后缓存的行号可能落在空行或更短的行上
+                if len(fields) <= name_field:
+                    return False
+                current = fields[name_field]
+            else:
+                current = line.split(b':', 1)[0].strip()
+            if current != name:
+                return False
+        return True
+
+    @staticmethod
+    def _locate_disks(lines):
+        """定位整块磁盘所在的行，跳过分区和虚拟设备"""
+        try:
+            whole_disks = {name.encode() for name in os.listdir('/sys/block')}
+        except OSError:
+            whole_disks = None
+        located = {}
+        for i, line in enumerate(lines):
+            fields = line.split()
+            if len(fields) < 10:
+                continue
+            name = fields[2]
+            if name.startswith(_IGNORED_DISK_PREFIXES):
+                continue
+            if whole_disks is not None and name not in whole_disks:
+                continue
+            located[i] = name
+        return located
+
+    @staticmethod
+    def _locate_interfaces(lines):
+        """定位网卡所在的行，跳过表头和回环接口"""
+        located = {}
+        for i, line in enumerate(lines):
+            if b':' not in line:
+                continue
+            name = line.split(b':', 1)[0].strip()
+            if name == b'lo':
+                continue
+            located[i] = name
+        return located
+
+    @staticmethod
+    def _read_psutil():
+        cpu = psutil.cpu_times()
+        iowait = getattr(cpu, 'iowait', 0.0)
+        mem = psutil.virtual_memory()
+        disk = psutil.disk_io_counters()
+        net = psutil.net_io_counters()
+        return {
+            'cpu_total': sum(cpu),
+            'cpu_idle': cpu.idle + iowait,
+            'cpu_iowait': iowait,
+            'mem_available_kb': mem.available / 1024.0,
+            'mem_percent': mem.percent,
+            'disk_read': disk.read_bytes if disk else 0,
+            'disk_write': disk.write_bytes if disk else 0,
+            'net_rx': net.bytes_recv,
+            'net_tx': net.bytes_sent,
+        }
+
+    @staticmethod
+    def format_sample(sample):
+        """
+        格式化采样结果，用于完成通知
+
+        Args:
+            sample (dict): sample() 的返回值
+
+        Returns:
+            str: 主机资源描述
+        """
+        def rate(value):
+            if value is None:
+                return "-"
+            return f"{value / 1024 / 1024:.2f}MB/s"
+
+        cpu = f"{sample['cpu_percent']:.1f}%" if sample['cpu_percent'] is not None else "-"
+        iowait = f"{sample['iowait_percent']:.1f}%" if sample['iowait_percent'] is not None else "-"
+        lines = [
+            f"- CPU: {cpu} (IO等待 {iowait})",
+            f"- 内存: {sample['mem_percent']:.1f}% (可用 {sample['mem_available_mb']:.0f}MB)",
+            f"- 磁盘: 读 {rate(sample['disk_read_bps'])} / 写 {rate(sample['disk_write_bps'])}",
+            f"- 网络: 收 {rate(sample['net_rx_bps'])} / 发 {rate(sample['net_tx_bps'])}",
+        ]
+        return "\n".join(lines)
@@ -0,0 +1,368 @@
+import os
+import glob
+import gzip
+import logging
+
+logger = logging.getLogger(__name__)
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# 每次读取的块大小
+DEFAULT_CHUNK_SIZE = 1024 * 1024
+
+# 压缩日志的扩展名
+GZIP_SUFFIXES = ('.gz',)
+ZSTD_SUFFIXES = ('.zst', '.zstd')
+
+
+class _MarkerMatcher:
+    """
+    分块匹配完成标记
+
+    相邻块之间保留 (最长标记长度 - 1) 字节的重叠，保证跨块的标记也能被找到。
+    """
+
+    def __init__(self, markers):
+        self.encoded = [(marker, marker.encode('utf-8')) for marker in markers]
+        self.overlap = max((len(m) for _, m in self.encoded), default=1) - 1
+        self.tail = b''
+
+    def feed(self, chunk):
+        """处理一块新数据，返回其中找到的标记"""
+        data = self.tail + chunk
+        self.tail = data[-self.overlap:] if self.overlap else b''
+        for marker, encoded in self.encoded:
+            if encoded in data:
+                return marker
+        return None
+
+
+class LogMarkerScanner:
+    """
+    增量日志标记扫描
+
+    记录已读取的字节偏移，每次只读取新追加的内容。
+    文件被截断或替换（inode变化）时从头开始扫描。
+    """
+
+    def __init__(self, path, markers, chunk_size=DEFAULT_CHUNK_SIZE):
+        """
+        初始化日志扫描器
+
+        Args:
+            path (str): 日志文件路径
+            markers (list): 完成标记列表
+            chunk_size (int): 每次读取的字节数
+        """
+        self.path = path
+        self.markers = list(markers)
+        self.chunk_size = chunk_size
+        self._matcher = _MarkerMatcher(self.markers)
+
+        self.offset = 0
+        self.file_id = None
+
+    def _reset(self, file_id):
+        self.offset = 0
+        self.file_id = file_id
+        self._matcher.tail = b''
+
+    def skip_to(self, offset, file_id):
+        """
+        跳过已有内容，只扫描之后追加的部分
+
+        Args:
+            offset (int): 起始偏移
+            file_id (list): [st_dev, st_ino]
+        """
+        self._reset(file_id)
+        self.offset = offset
+
+    def scan(self):
+        """
+        扫描日志新增内容
+
+        Returns:
+            str: 找到的完成标记，未找到时返回None
+        """
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+
+        file_id = [st.st_dev, st.st_ino]
+        if file_id != self.file_id or st.st_size < self.offset:
+            self._reset(file_id)
+        if st.st_size == self.offset:
+            return None
+
+        with open(self.path, 'rb') as f:
+            f.seek(self.offset)
+            while True:
+                chunk = f.read(self.chunk_size)
+                if not chunk:
+                    break
+                self.offset += len(chunk)
+                found = self._matcher.feed(chunk)
+                if found:
+                    return found
+        return None
+
+    def get_state(self):
+        """
+        导出扫描进度，用于状态快照
+
+        Returns:
+            dict: 可JSON序列化的扫描状态
+        """
+        return {
+            'path': self.path,
+            'offset': self.offset,
+            'file_id': self.file_id,
+            'tail': self._matcher.tail.decode('latin-1'),
+        }
+
+    def set_state(self, state):
+        """
+        从状态快照恢复扫描进度
+
+        Args:
+            state (dict): get_state() 导出的状态
+        """
+        if not state or state.get('path') != self.path:
+            return
+        self.offset = state.get('offset', 0)
+        self.file_id = state.get('file_id')
+        overlap = self._matcher.overlap
+        self._matcher.tail = state.get('tail', '').encode('latin-1')[-overlap:] if overlap else b''
+
+
+class RotatingLogScanner:
+    """
+    支持日志轮转和压缩的日志集合扫描
+
+    - 路径可以是glob模式（如 ./logs/train.log*）；普通路径会同时匹配轮转产生的
+      同名文件（train.log.1、train.log.2.gz 等）。
+    - 未压缩文件按inode跟踪读取位置，文件被重命名轮转后从原位置继续读取，
+      轮转间隙写入的完成标记不会丢失。
+    - gzip/zstd 压缩段按块流式解压，内存占用与文件大小无关；扫描完成的压缩段
+      按 (设备, inode, 大小, 修改时间) 记录，之后不再重复扫描。
+    - 轮转文件中修改时间早于 since 的部分视为旧任务的日志，不参与匹配。
+    """
+
+    def __init__(self, pattern, markers, since=None, include_rotated=True, chunk_size=DEFAULT_CHUNK_SIZE):
+        """
+        初始化日志集合扫描器
+
+        Args:
+            pattern (str): 日志路径或glob模式
+            markers (list): 完成标记列表
+            since (float, optional): 任务开始时间戳，更早的轮转文件不参与匹配
+            include_rotated (bool): 普通路径是否同时匹配轮转文件
+            chunk_size (int): 每次读取的字节数
+        """
+        self.path = pattern
+        self.markers = list(markers)
+        self.since = since
+        self.include_rotated = include_rotated
+        self.chunk_size = chunk_size
+
+        self._scanners = {}
+        self._completed = set()
+        self._zstd_warned = False
+        # 最近一次发现完成标记的文件
+        self.matched_path = None
+
+    def _expand(self):
+        """展开当前匹配的日志文件"""
+        if glob.has_magic(self.path):
+            return sorted(glob.glob(self.path))
+        paths = [self.path] if os.path.exists(self.path) else []
+        if self.include_rotated:
+            paths.extend(sorted(glob.glob(glob.escape(self.path) + '.*')))
+        return paths
+
+    def _is_primary(self, path):
+        return not glob.has_magic(self.path) and path == self.path
+
+    def scan(self):
+        """
+        扫描日志集合中的新增内容
+
+        Returns:
+            str: 找到的完成标记，未找到时返回None
+        """
+        seen_files = set()
+        seen_completed = set()
+        found = None
+        for path in self._expand():
+            try:
+                st = os.stat(path)
+            except FileNotFoundError:
+                continue
+            file_id = (st.st_dev, st.st_ino)
+            old = not self._is_primary(path) and self.since is not None and st.st_mtime < self.since
+
+            if path.endswith(GZIP_SUFFIXES + ZSTD_SUFFIXES):
+                key = (st.st_dev, st.st_ino, st.st_size, st.st_mtime_ns)
+                seen_completed.add(key)
+                if key in self._completed:
+                    continue
+                if old:
+                    self._completed.add(key)
+                    continue
+                marker, complete = self._scan_compressed(path)
+                if complete:
+                    self._completed.add(key)
+            else:
+                seen_files.add(file_id)
+                scanner = self._scanners.get(file_id)
+                if scanner is None:
+                    scanner = LogMarkerScanner(path, self.markers, self.chunk_size)
+                    if old:
+                        scanner.skip_to(st.st_size, list(file_id))
+                    self._scanners[file_id] = scanner
+                # 文件被轮转重命名后inode不变，沿用原有读取位置
+                scanner.path = path
+                marker = scanner.scan()
+
+            if marker and not found:
+                logger.info(f"在日志 {path} 中发现完成标记")
+                found = marker
+                self.matched_path = path
+                break
+
+        if found is None:
+            # 只保留仍然存在的文件，内存占用与文件数量成正比
+            self._scanners = {fid: s for fid, s in self._scanners.items() if fid in seen_files}
+            self._completed &= seen_completed
+        return found
+
+    def _open_compressed(self, path):
+        if path.endswith(GZIP_SUFFIXES):
+            return gzip.open(path, 'rb')
+        if zstandard is None:
+            if not self._zstd_warned:
+                logger.warning("未安装zstandard，跳过zstd压缩日志")
+                self._zstd_warned = True
+            return None
+        f = open(path, 'rb')
+        try:
+            reader = zstandard.ZstdDecompressor().stream_reader(f, closefd=True)
+        except Exception:
+            f.close()
+            raise
+        return reader
+
+    def _scan_compressed(self, path):
+        """
+        流式解压并扫描压缩日志
+
+        Returns:
+            tuple: (找到的标记或None, 是否完整读取)
+        """
+        matcher = _MarkerMatcher(self.markers)
+        try:
+            stream = self._open_compressed(path)
+            if stream is None:
+                return None, True
+            with stream:
+                while True:
+                    chunk = stream.read(self.chunk_size)
+                    if not chunk:
+                        return None, True
+                    marker = matcher.feed(chunk)
+                    if marker:
+                        return marker, True
+        except EOFError:
+            # 压缩文件仍在写入，下次大小变化后重新扫描
+            logger.debug(f"压缩日志尚未写入完成: {path}")
+            return None, False
+        except Exception as e:
+            # 损坏的压缩文件在内容变化前不再重试
+            logger.error(f"读取压缩日志失败 {path}: {str(e)}")
+            return None, True
+
+    def read_tail(self, tail_bytes=65536):
+        """
+        读取日志集合中最新内容的末尾部分
+
+        优先读取发现完成标记的文件，否则读取修改时间最新的非空文件；
+        压缩文件流式解压，只保留最后 tail_bytes 字节。
+
+        Args:
+            tail_bytes (int): 最多读取的字节数
+
+        Returns:
+            bytes: 日志末尾内容，没有可读的日志时返回b''
+        """
+        path = self.matched_path if self.matched_path and os.path.exists(self.matched_path) else None
+        if path is None:
+            newest = None
+            for candidate in self._expand():
+                try:
+                    st = os.stat(candidate)
+                except FileNotFoundError:
+                    continue
+                if st.st_size and (newest is None or st.st_mtime_ns > newest[0]):
+                    newest = (st.st_mtime_ns, candidate)
+            if newest is None:
+                return b''
+            path = newest[1]
+
+        if not path.endswith(GZIP_SUFFIXES + ZSTD_SUFFIXES):
+            with open(path, 'rb') as f:
+                f.seek(0, os.SEEK_END)
+                f.seek(max(0, f.tell() - tail_bytes))
+                return f.read()
+
+        tail = b''
+        stream = self._open_compressed(path)
+        if stream is None:
+            return tail
+        try:
+            with stream:
+                while True:
+                    chunk = stream.read(self.chunk_size)
+                    if not chunk:
+                        break
+                    tail = (tail + chunk)[-tail_bytes:]
+        except EOFError:
+            # 压缩文件仍在写入，使用已解压的部分
+            pass
+        return tail
+
+    def get_state(self):
+        """
+        导出扫描进度，用于状态快照
+
+        Returns:
+            dict: 可JSON序列化的扫描状态
+        """
+        return {
+            'path': self.path,
+            'matched_path': self.matched_path,
+            'scanners': [scanner.get_state() for scanner in self._scanners.values()],
+            'completed': [list(key) for key in self._completed],
+        }
+
+    def set_state(self, state):
+        """
+        从状态快照恢复扫描进度
+
+        Args:
+            state (dict): get_state() 导出的状态
+        """
+        if not state or state.get('path') != self.path:
+            return
+        for scanner_state in state.get('scanners', []):
+            if not scanner_state.get('file_id'):
+                continue
+            scanner = LogMarkerScanner(scanner_state['path'], self.markers, self.chunk_size)
+            scanner.set_state(scanner_state)
+            self._scanners[tuple(scanner_state['file_id'])] = scanner
+        self._completed = {tuple(key) for key in state.get('completed', [])}
+        self.matched_path = state.get('matched_path')
@@ -0,0 +1,276 @@
+import os
+import json
+import math
+import sqlite3
+import logging
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DB_PATH = "./logs/run_history.db"
+
+# 分页大小上限，避免一次返回过多数据
+MAX_PAGE_SIZE = 500
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    project TEXT NOT NULL,
+    host TEXT,
+    start_ts REAL NOT NULL,
+    end_ts REAL NOT NULL,
+    duration REAL NOT NULL,
+    method TEXT,
+    gpu_summary TEXT,
+    metrics TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_runs_end ON runs (end_ts);
+CREATE INDEX IF NOT EXISTS idx_runs_project_end ON runs (project, end_ts);
+DROP INDEX IF EXISTS idx_runs_project_duration;
+CREATE INDEX IF NOT EXISTS idx_runs_project_duration_cover ON runs (project, duration, end_ts, start_ts);
+"""
+
+_COLUMNS = "id, project, host, start_ts, end_ts, duration, method, gpu_summary, metrics"
+
+
+def parse_time(value):
+    """
+    解析时间参数
+
+    Args:
+        value (str|float|datetime): Unix时间戳、ISO格式或"%Y-%m-%d %H:%M:%S"格式的时间
+
+    Returns:
+        float: Unix时间戳，value为空时返回None
+
+    Raises:
+        ValueError: 无法解析时间格式
+    """
+    if value is None or value == '':
+        return None
+    if isinstance(value, datetime):
+        return value.timestamp()
+    if isinstance(value, (int, float)):
+        return float(value)
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    return datetime.fromisoformat(str(value).strip()).timestamp()
+
+
+def _format_time(ts):
+    return datetime.fromtimestamp(ts).strftime("%Y-%m-%d %H:%M:%S")
+
+
+def _percentile_offset(count, pct):
+    """最近秩法计算分位数在有序序列中的下标"""
+    return max(0, min(count - 1, int(math.ceil(pct / 100.0 * count)) - 1))
+
+
+class RunHistoryStore:
+    """
+    任务运行历史存储
+
+    基于SQLite，按项目和结束时间建立索引，支持过滤、游标分页查询
+    以及按项目统计耗时分位数。
+    """
+
+    def __init__(self, db_path=DEFAULT_DB_PATH):
+        """
+        初始化运行历史存储
+
+        Args:
+            db_path (str): SQLite数据库文件路径
+        """
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        directory = os.path.dirname(os.path.abspath(db_path))
+        os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            # WAL模式下写入不阻塞Web界面的并发查询
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=10)
+        conn.row_factory = sqlite3.Row
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def record_run(self, project, start_time, end_time, method=None, host=None, gpu_summary=None, metrics=None):
+        """
+        记录一次任务运行
+
+        Args:
+            project (str): 项目名称
+            start_time (datetime): 开始时间
+            end_time (datetime): 结束时间
+            method (str, optional): 完成判断依据
+            host (str, optional): 主机名
+            gpu_summary (str, optional): GPU信息摘要
+            metrics (dict, optional): 最终指标
+
+        Returns:
+            int: 新记录的ID
+        """
+        start_ts = parse_time(start_time)
+        end_ts = parse_time(end_time)
+        with self._lock, self._connect() as conn:
+            cursor = conn.execute(
+                "INSERT INTO runs (project, host, start_ts, end_ts, duration, method, gpu_summary, metrics) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (project, host, start_ts, end_ts, end_ts - start_ts, method, gpu_summary,
+                 json.dumps(metrics or {}, ensure_ascii=False))
+            )
+            return cursor.lastrowid
+
+    @staticmethod
+    def _row_to_dict(row):
+        run = dict(row)
+        run['metrics'] = json.loads(run['metrics']) if run['metrics'] else {}
+        run['start_time'] = _format_time(run['start_ts'])
+        run['end_time'] = _format_time(run['end_ts'])
+        return run
+
+    @staticmethod
+    def _build_filters(project=None, host=None, method=None, since=None, until=None):
+        clauses = []
+        params = []
+        if project:
+            clauses.append("project = ?")
+            params.append(project)
+        if host:
+            clauses.append("host = ?")
+            params.append(host)
+        if method:
+            clauses.append("method = ?")
+            params.append(method)
+        since = parse_time(since)
+        if since is not None:
+            clauses.append("end_ts >= ?")
+            params.append(since)
+        until = parse_time(until)
+        if until is not None:
+            clauses.append("end_ts < ?")
+            params.append(until)
+        return clauses, params
+
+    def get_run(self, run_id):
+        """
+        获取单条运行记录
+
+        Args:
+            run_id (int): 记录ID
+
+        Returns:
+            dict: 运行记录，不存在时返回None
+        """
+        with self._connect() as conn:
+            row = conn.execute(f"SELECT {_COLUMNS} FROM runs WHERE id = ?", (run_id,)).fetchone()
+        return self._row_to_dict(row) if row else None
+
+    def query_runs(self, project=None, host=None, method=None, since=None, until=None, limit=50, cursor=None):
+        """
+        按条件分页查询运行记录（按结束时间倒序）
+
+        使用 (end_ts, id) 游标分页，翻页代价与页码无关。
+
+        Args:
+            project (str, optional): 项目名称
+            host (str, optional): 主机名
+            method (str, optional): 完成判断依据
+            since (str|float, optional): 结束时间下限（包含）
+            until (str|float, optional): 结束时间上限（不包含）
+            limit (int): 每页条数
+            cursor (str, optional): 上一页返回的 next_cursor
+
+        Returns:
+            dict: {'runs': [...], 'next_cursor': str或None}
+
+        Raises:
+            ValueError: 参数格式错误
+        """
+        limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+        clauses, params = self._build_filters(project, host, method, since, until)
+        if cursor:
+            cursor_ts, cursor_id = cursor.split(':', 1)
+            clauses.append("(end_ts < ? OR (end_ts = ? AND id < ?))")
+            params.extend([float(cursor_ts), float(cursor_ts), int(cursor_id)])
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        sql = f"SELECT {_COLUMNS} FROM runs {where} ORDER BY end_ts DESC, id DESC LIMIT ?"
+        with self._connect() as conn:
+            rows = conn.execute(sql, params + [limit + 1]).fetchall()
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            last = rows[-1]
+            next_cursor = f"{last['end_ts']!r}:{last['id']}"
+        return {
+            'runs': [self._row_to_dict(row) for row in rows],
+            'next_cursor': next_cursor
+        }
+
+    def duration_stats(self, project=None, since=None, until=None, percentiles=(50, 95)):
+        """
+        按项目统计任务耗时
+
+        汇总查询由 (project, duration, end_ts, start_ts) 覆盖索引完成，不回表
+        （时间范围较窄时SQLite会改用结束时间索引）。分位数按耗时顺序遍历该覆盖索引
+        并用 OFFSET 定位，时间范围条件直接在索引项上过滤，不需要额外排序，
+        也无需把耗时全部读入内存。
+
+        Args:
+            project (str, optional): 只统计指定项目
+            since (str|float, optional): 结束时间下限（包含）
+            until (str|float, optional): 结束时间上限（不包含）
+            percentiles (tuple): 需要计算的分位数
+
+        Returns:
+            list: 每个项目的统计信息，耗时单位为秒
+        """
+        clauses, params = self._build_filters(project=project, since=since, until=until)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        stats = []
+        with self._connect() as conn:
+            rows = conn.execute(
+                f"SELECT project, COUNT(*) AS count, AVG(duration) AS avg, MIN(duration) AS min, "
+                f"MAX(duration) AS max, MIN(start_ts) AS first_ts, MAX(end_ts) AS last_ts "
+                f"FROM runs {where} GROUP BY project ORDER BY project",
+                params
+            ).fetchall()
+            for row in rows:
+                item = {
+                    'project': row['project'],
+                    'count': row['count'],
+                    'avg': row['avg'],
+                    'min': row['min'],
+                    'max': row['max'],
+                    'first_time': _format_time(row['first_ts']),
+                    'last_time': _format_time(row['last_ts']),
+                }
+                project_clauses = ["project = ?"] + [c for c in clauses if not c.startswith("project")]
+                project_params = [row['project']] + [p for c, p in zip(clauses, params) if not c.startswith("project")]
+                for pct in percentiles:
+                    # 从离目标更近的一端遍历索引，高分位数从大到小查找
+                    offset = _percentile_offset(row['count'], pct)
+                    order = "ASC"
+                    if offset > row['count'] // 2:
+                        offset = row['count'] - 1 - offset
+                        order = "DESC"
+                    value = conn.execute(
+                        f"SELECT duration FROM runs INDEXED BY idx_runs_project_duration_cover "
+                        f"WHERE {' AND '.join(project_clauses)} "
+                        f"ORDER BY duration {order} LIMIT 1 OFFSET ?",
+                        project_params + [offset]
+                    ).fetchone()
+                    item[f'p{pct}'] = value['duration'] if value else None
+                stats.append(item)
+        return stats
@@ -0,0 +1,119 @@
+import os
+import json
+import time
+import logging
+import tempfile
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SNAPSHOT_PATH = "./logs/monitor_state.json"
+
+# 2: 日志扫描进度改为按日志集合记录（RotatingLogScanner），旧版本快照不再恢复
+SNAPSHOT_VERSION = 2
+
+
+class MonitorStateSnapshot:
+    """
+    监控状态快照
+
+    以紧凑JSON定期保存监控器状态。写入先落到同目录临时文件，fsync后
+    通过 os.replace 原子替换，进程在任意时刻崩溃都不会留下损坏的快照。
+    快照带有配置指纹，监控目标变化后旧快照会被忽略。
+    """
+
+    def __init__(self, path=DEFAULT_SNAPSHOT_PATH, interval=30, fingerprint=None):
+        """
+        初始化状态快照
+
+        Args:
+            path (str): 快照文件路径
+            interval (float): 两次保存之间的最小间隔(秒)
+            fingerprint (str, optional): 配置指纹，用于判断快照是否属于当前任务
+        """
+        self.path = path
+        self.interval = interval
+        self.fingerprint = fingerprint
+        self._last_save = 0.0
+
+    def load(self):
+        """
+        读取快照
+
+        Returns:
+            dict: 快照中的状态，不存在、损坏或不属于当前任务时返回None
+        """
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                snapshot = json.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"读取状态快照失败，忽略快照: {str(e)}")
+            return None
+
+        if snapshot.get('version') != SNAPSHOT_VERSION:
+            logger.info(f"状态快照版本 {snapshot.get('version')} 与当前版本 {SNAPSHOT_VERSION} 不一致，忽略快照")
+            return None
+        if snapshot.get('fingerprint') != self.fingerprint:
+            logger.info("状态快照与当前配置不匹配，忽略快照")
+            return None
+        return snapshot.get('state')
+
+    def save(self, state):
+        """
+        立即保存快照
+
+        Args:
+            state (dict): 可JSON序列化的监控状态
+
+        Returns:
+            bool: 是否保存成功
+        """
+        snapshot = {
+            'version': SNAPSHOT_VERSION,
+            'fingerprint': self.fingerprint,
+            'saved_at': time.time(),
+            'state': state,
+        }
+        directory = os.path.dirname(os.path.abspath(self.path))
+        try:
+            os.makedirs(directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(prefix='.monitor_state_', dir=directory)
+            try:
+                with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                    json.dump(snapshot, f, ensure_ascii=False, separators=(',', ':'))
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp_path, self.path)
+            except BaseException:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                raise
+            self._last_save = time.monotonic()
+            return True
+        except Exception as e:
+            logger.error(f"保存状态快照失败: {str(e)}")
+            return False
+
+    def maybe_save(self, get_state):
+        """
+        距上次保存超过 interval 时保存快照
+
+        Args:
+            get_state (callable): 返回当前状态的函数，只在需要保存时调用
+
+        Returns:
+            bool: 本次是否进行了保存
+        """
+        if time.monotonic() - self._last_save < self.interval:
+            return False
+        return self.save(get_state())
+
+    def clear(self):
+        """删除快照文件"""
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.error(f"删除状态快照失败: {str(e)}")
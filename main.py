@@ -1,4 +1,5 @@
 import os
+import copy
 import time
 import requests
 import json
@@ -6,8 +7,17 @@ import argparse
 import logging
 import yaml
 import subprocess
+import re
+import hashlib
 from datetime import datetime
 
+from core.run_history import RunHistoryStore, DEFAULT_DB_PATH
+from core.gpu_attribution import GpuJobAttributor
+from core.log_scanner import RotatingLogScanner
+from core.checkpoint_watcher import CheckpointWatcher
+from core.state_snapshot import MonitorStateSnapshot, DEFAULT_SNAPSHOT_PATH
+from core.host_telemetry import HostTelemetry
+
 # 配置日志
 logging.basicConfig(level=logging.INFO, 
                     format='%(asctime)s - %(levelname)s - %(message)s',
@@ -26,17 +36,57 @@ DEFAULT_CONFIG = {
         # 文件检查
         "check_file_enabled": True,
         "check_file_path": "./output/model_final.pth",
+
+        # 检查点目录检查（按模式匹配多个检查点文件）
+        "check_ckpt_enabled": False,
+        "check_ckpt_dir": "./output",
+        "check_ckpt_pattern": "ckpt_epoch_*.pth",
+        "check_ckpt_min_epoch": None,
+        "check_ckpt_min_count": 1,
+        "check_ckpt_stable_checks": 2,
+        "check_ckpt_use_inotify": True,
         
         # 日志检查
         "check_log_enabled": False,
         "check_log_path": "./logs/training.log",
         "check_log_markers": ["Training completed", "训练完成"],
+        "check_log_rotated": True,
         
         # GPU功耗检查
         "check_gpu_power_enabled": False,
         "check_gpu_power_threshold": 50.0,
         "check_gpu_power_gpu_ids": "all",
-        "check_gpu_power_consecutive_checks": 3
+        "check_gpu_power_consecutive_checks": 3,
+
+        # GPU归属识别（check_gpu_power_gpu_ids为auto时使用）
+        "check_gpu_job_pid": None,
+        "check_gpu_job_cgroup": None,
+        "check_gpu_job_process_name": None,
+        "check_gpu_attribution_refresh": 30,
+
+        # 主机资源采集
+        "host_telemetry_enabled": True,
+        "host_telemetry_backend": "auto",
+        "host_telemetry_interval": 5,
+
+        # 主机资源空闲检查（CPU、磁盘、网络同时低于阈值）
+        "check_host_idle_enabled": False,
+        "check_host_idle_cpu_threshold": 10.0,
+        "check_host_idle_disk_threshold": 1.0,
+        "check_host_idle_net_threshold": 1.0,
+        "check_host_idle_consecutive_checks": 3,
+
+        # 状态快照（重启后从快照恢复监控进度）
+        "state_snapshot_enabled": True,
+        "state_snapshot_path": DEFAULT_SNAPSHOT_PATH,
+        "state_snapshot_interval": 30,
+        "state_snapshot_resend_attempts": 3,      # 未发送通知的最多发送次数
+        "state_snapshot_resend_max_age": 86400,   # 超过该秒数的未发送通知不再重发
+
+        # 运行历史记录
+        "history_enabled": True,
+        "history_db_path": DEFAULT_DB_PATH,
+        "history_metric_keys": ["loss", "acc", "accuracy"]
     },
     
     "webhook": {
@@ -65,6 +115,9 @@ DEFAULT_CONFIG = {
         "include_gpu_info": True,
         "include_gpu_info_title":"GPU信息",
 
+        "include_host_info": True,
+        "include_host_info_title":"主机资源",
+
         "footer": "此消息由TaskNya发送"
     }
 }
@@ -78,9 +131,20 @@ class TrainingMonitor:
             config_path (str, optional): 配置文件路径
         """
         # 加载配置，如果没有指定配置文件，使用默认配置
-        self.config = self._load_config(config_path) if config_path else DEFAULT_CONFIG
+        self.config = self._load_config(config_path) if config_path else copy.deepcopy(DEFAULT_CONFIG)
         self.start_time = datetime.now()
         self.low_power_count = 0
+        self.elapsed_time = 0
+        self.host_idle_count = 0
+        self.gpu_attributor = None
+        self.host_telemetry = None
+        self._host_telemetry_unavailable = False
+        self._host_sample_time = None
+        self.log_scanner = None
+        self.checkpoint_watcher = None
+        self._checkpoint_params = None
+        self.pending_notification = None
+        self.snapshot = None
         self.should_stop = lambda: False  # 默认的停止检查函数
         
     def _load_config(self, config_path):
@@ -98,8 +162,8 @@ class TrainingMonitor:
                 user_config = yaml.safe_load(file)
                 logger.info("成功加载配置文件")
                 
-                # 合并配置，确保所有必需的参数都存在
-                config = DEFAULT_CONFIG.copy()
+                # 合并配置，确保所有必需的参数都存在；深拷贝避免修改共享的默认配置
+                config = copy.deepcopy(DEFAULT_CONFIG)
                 
                 # 更新监控配置
                 if user_config.get('monitor'):
@@ -113,7 +177,7 @@ class TrainingMonitor:
         except Exception as e:
             logger.error(f"加载配置文件失败: {str(e)}")
             logger.info("使用默认配置")
-            return DEFAULT_CONFIG
+            return copy.deepcopy(DEFAULT_CONFIG)
         
     def is_training_complete(self):
         """
@@ -131,19 +195,13 @@ class TrainingMonitor:
                 
         # 方法2: 检查日志文件中是否包含完成标记
         if self.config['monitor']['check_log_enabled']:
-            log_path = self.config['monitor']['check_log_path']
-            markers = self.config['monitor']['check_log_markers']
-            
-            if os.path.exists(log_path):
-                try:
-                    with open(log_path, 'r', encoding='utf-8', errors='ignore') as f:
-                        content = f.read()
-                        for marker in markers:
-                            if marker in content:
-                                logger.info(f"在日志中发现完成标记: {marker}")
-                                return True ,"日志检测"
-                except Exception as e:
-                    logger.error(f"读取日志文件失败: {str(e)}")
+            try:
+                marker = self._get_log_scanner().scan()
+                if marker:
+                    logger.info(f"在日志中发现完成标记: {marker}")
+                    return True ,"日志检测"
+            except Exception as e:
+                logger.error(f"读取日志文件失败: {str(e)}")
                             
         # 方法3: 检查GPU功耗是否低于阈值
         if self.config['monitor']['check_gpu_power_enabled']:
@@ -166,16 +224,173 @@ class TrainingMonitor:
                     self.low_power_count = 0
             except (subprocess.SubprocessError, FileNotFoundError):
                 logger.warning("未检测到NVIDIA显卡或nvidia-smi不可用，跳过GPU功耗检查")
+        
+        # 方法4: 检查主机CPU、磁盘和网络是否持续空闲
+        if self.config['monitor'].get('check_host_idle_enabled'):
+            sample = self._sample_host_telemetry()
+            if sample and sample['cpu_percent'] is not None:
+                consecutive_checks = self.config['monitor']['check_host_idle_consecutive_checks']
+                if self._is_host_idle(sample):
+                    self.host_idle_count += 1
+                    logger.info(f"主机资源空闲次数: [{self.host_idle_count}/{consecutive_checks}]")
+                    if self.host_idle_count >= consecutive_checks:
+                        logger.info(f"主机CPU、磁盘和网络已连续{consecutive_checks}次低于阈值，判定任务完成")
+                        return True, "主机资源空闲检测"
+                else:
+                    self.host_idle_count = 0
+
+        # 方法5: 检查目录中是否已有满足条件且大小稳定的检查点文件
+        if self.config['monitor'].get('check_ckpt_enabled'):
+            try:
+                watcher = self._get_checkpoint_watcher()
+                if watcher.check():
+                    summary = watcher.summary()
+                    logger.info(f"检查点目录满足完成条件: 稳定文件 {summary['stable']} 个，"
+                                f"最新轮次 {summary['latest_epoch']}")
+                    return True, "检查点目录检测"
+            except Exception as e:
+                logger.error(f"检查检查点目录失败: {str(e)}")
                 
         return False, "未完成任务"
     
+    def _get_host_telemetry(self):
+        """
+        获取主机资源采集器
+        
+        Returns:
+            HostTelemetry: 采集器，未启用或当前环境不支持时返回None
+        """
+        if self.host_telemetry is None:
+            if self._host_telemetry_unavailable or not self.config['monitor'].get('host_telemetry_enabled', True):
+                return None
+            try:
+                self.host_telemetry = HostTelemetry(self.config['monitor'].get('host_telemetry_backend', 'auto'))
+            except (RuntimeError, OSError) as e:
+                # 只记录在本实例上，不修改配置
+                logger.warning(f"主机资源采集不可用: {str(e)}")
+                self._host_telemetry_unavailable = True
+                return None
+        return self.host_telemetry
+    
+    def _sample_host_telemetry(self):
+        """
+        按 host_telemetry_interval 采集主机资源
+        
+        Returns:
+            dict: 本次新采集的数据，未到采集时间或不可用时返回None
+        """
+        telemetry = self._get_host_telemetry()
+        if telemetry is None:
+            return None
+        
+        now = time.monotonic()
+        interval = self.config['monitor'].get('host_telemetry_interval', 5)
+        if self._host_sample_time is not None and now - self._host_sample_time < interval:
+            return None
+        self._host_sample_time = now
+        try:
+            return telemetry.sample()
+        except Exception as e:
+            logger.error(f"采集主机资源失败: {str(e)}")
+            return None
+    
+    def _is_host_idle(self, sample):
+        """
+        判断主机CPU、磁盘和网络是否都低于阈值
+        
+        Args:
+            sample (dict): 主机资源采样
+            
+        Returns:
+            bool: 是否空闲
+        """
+        monitor_config = self.config['monitor']
+        mb = 1024 * 1024
+        if sample['cpu_percent'] >= monitor_config['check_host_idle_cpu_threshold']:
+            logger.debug(f"CPU占用 {sample['cpu_percent']:.1f}% 高于阈值")
+            return False
+        disk_bps = (sample['disk_read_bps'] or 0) + (sample['disk_write_bps'] or 0)
+        if disk_bps >= monitor_config['check_host_idle_disk_threshold'] * mb:
+            logger.debug(f"磁盘IO {disk_bps / mb:.2f}MB/s 高于阈值")
+            return False
+        net_bps = (sample['net_rx_bps'] or 0) + (sample['net_tx_bps'] or 0)
+        if net_bps >= monitor_config['check_host_idle_net_threshold'] * mb:
+            logger.debug(f"网络流量 {net_bps / mb:.2f}MB/s 高于阈值")
+            return False
+        return True
+    
+    def _get_log_scanner(self):
+        """
+        获取日志扫描器，只读取上次扫描之后新增的日志内容
+        
+        日志路径支持glob模式，并会跟踪轮转产生的文件（包括gzip/zstd压缩文件）。
+        
+        Returns:
+            RotatingLogScanner: 日志扫描器
+        """
+        log_path = self.config['monitor']['check_log_path']
+        markers = self.config['monitor']['check_log_markers']
+        if self.log_scanner is None or self.log_scanner.path != log_path or self.log_scanner.markers != list(markers):
+            self.log_scanner = RotatingLogScanner(
+                log_path,
+                markers,
+                since=self.start_time.timestamp(),
+                include_rotated=self.config['monitor'].get('check_log_rotated', True)
+            )
+        return self.log_scanner
+    
+    def _get_checkpoint_watcher(self):
+        """
+        获取检查点目录监视器，目录或匹配条件变化时重新创建
+        
+        Returns:
+            CheckpointWatcher: 检查点目录监视器
+        """
+        monitor_config = self.config['monitor']
+        params = (
+            monitor_config['check_ckpt_dir'],
+            monitor_config['check_ckpt_pattern'],
+            monitor_config.get('check_ckpt_min_epoch'),
+            monitor_config.get('check_ckpt_min_count', 1),
+            monitor_config.get('check_ckpt_stable_checks', 2),
+            monitor_config.get('check_ckpt_use_inotify', True),
+        )
+        if self.checkpoint_watcher is None or self._checkpoint_params != params:
+            if self.checkpoint_watcher is not None:
+                self.checkpoint_watcher.close()
+            self.checkpoint_watcher = CheckpointWatcher(*params)
+            self._checkpoint_params = params
+        return self.checkpoint_watcher
+    
+    def _get_job_gpu_ids(self):
+        """
+        获取当前任务占用的GPU编号
+        
+        Returns:
+            list: GPU编号列表，未配置任务识别方式或尚未识别到时返回None
+        """
+        if self.gpu_attributor is None:
+            monitor_config = self.config['monitor']
+            self.gpu_attributor = GpuJobAttributor(
+                pid=monitor_config.get('check_gpu_job_pid'),
+                cgroup=monitor_config.get('check_gpu_job_cgroup'),
+                process_name=monitor_config.get('check_gpu_job_process_name'),
+                refresh_interval=monitor_config.get('check_gpu_attribution_refresh', 30)
+            )
+            if not self.gpu_attributor.configured:
+                logger.warning("GPU ID设置为auto，但未配置任务PID、cgroup或进程名")
+        
+        if not self.gpu_attributor.configured:
+            return None
+        return self.gpu_attributor.get_gpu_ids()
+    
     def _check_gpu_power_below_threshold(self, threshold, gpu_ids):
         """
         检查GPU功耗是否低于阈值
         
         Args:
             threshold (float): 功耗阈值(瓦特)
-            gpu_ids (str): GPU ID，'all'表示所有GPU
+            gpu_ids (str): GPU ID，'all'表示所有GPU，'auto'表示自动识别任务占用的GPU
             
         Returns:
             bool: 是否所有指定GPU的功耗都低于阈值
@@ -200,6 +415,11 @@ class TrainingMonitor:
             # 确定要检查的GPU列表
             if gpu_ids == 'all':
                 check_gpus = list(gpu_power_info.keys())
+            elif gpu_ids == 'auto':
+                check_gpus = self._get_job_gpu_ids()
+                if not check_gpus:
+                    logger.debug("尚未识别到任务占用的GPU，跳过本次功耗判断")
+                    return False
             else:
                 if isinstance(gpu_ids, list):
                     check_gpus = [int(gid) for gid in gpu_ids]
@@ -255,6 +475,8 @@ class TrainingMonitor:
             content_items.append(f"**{training_info['hostname_title']}**: {training_info['hostname']}")
         if self.config['webhook']['include_gpu_info']:
             content_items.append(f"**{training_info['gpu_info_title']}**:\n{training_info['gpu_info']}")
+        if self.config['webhook'].get('include_host_info'):
+            content_items.append(f"**{training_info['host_info_title']}**:\n{training_info['host_info']}")
         
         # 确保至少有一个内容项
         if not content_items:
@@ -337,8 +559,15 @@ class TrainingMonitor:
             gpu_list = output.strip().split('\n')
             formatted_info = []
             
+            # 自动识别模式下只汇总任务占用的GPU
+            job_gpus = None
+            if self.config['monitor'].get('check_gpu_power_gpu_ids') == 'auto':
+                job_gpus = self._get_job_gpu_ids()
+            
             for gpu in gpu_list:
                 idx, name, mem_used, mem_total, power, temp = [x.strip() for x in gpu.split(',')]
+                if job_gpus and int(idx) not in job_gpus:
+                    continue
                 gpu_info = f"GPU {idx} ({name}):\n"
                 gpu_info += f"- 功耗: {power}W\n"
                 gpu_info += f"- 温度: {temp}°C\n"
@@ -353,9 +582,290 @@ class TrainingMonitor:
             logger.error(f"获取GPU信息失败: {str(e)}")
             return "无法获取GPU信息"
             
+    def get_host_info(self):
+        """
+        获取主机资源信息
+        
+        Returns:
+            str: 主机资源描述
+        """
+        telemetry = self._get_host_telemetry()
+        if telemetry is None:
+            return "主机资源采集不可用"
+        
+        try:
+            sample = telemetry.last_sample
+            if sample is None or sample['cpu_percent'] is None:
+                # 速率类指标需要两次采样
+                telemetry.sample()
+                time.sleep(0.5)
+                sample = telemetry.sample()
+            return HostTelemetry.format_sample(sample)
+        except Exception as e:
+            logger.error(f"获取主机资源信息失败: {str(e)}")
+            return "无法获取主机资源信息"
+            
+    def _collect_final_metrics(self, tail_bytes=65536):
+        """
+        从训练日志末尾提取最终指标
+
+        只读取日志最后 tail_bytes 字节，对每个指标取最后一次出现的数值。
+        日志路径为glob模式或完成标记位于轮转文件中时，读取发现完成标记的文件或最新的日志文件。
+
+        Returns:
+            dict: 指标名到数值的映射
+        """
+        keys = self.config['monitor'].get('history_metric_keys') or []
+        log_path = self.config['monitor'].get('check_log_path')
+        if not keys or not log_path:
+            return {}
+
+        try:
+            tail = self._get_log_scanner().read_tail(tail_bytes).decode('utf-8', errors='ignore')
+        except Exception as e:
+            logger.error(f"读取日志指标失败: {str(e)}")
+            return {}
+
+        metrics = {}
+        for key in keys:
+            pattern = re.compile(rf"\b{re.escape(key)}\s*[:=]\s*([-+]?\d*\.?\d+(?:[eE][-+]?\d+)?)")
+            matches = pattern.findall(tail)
+            if matches:
+                metrics[key] = float(matches[-1])
+        return metrics
+
+    def record_run_history(self, training_info, end_time):
+        """
+        将本次运行写入运行历史数据库
+
+        Args:
+            training_info (dict): 任务信息
+            end_time (datetime): 结束时间
+
+        Returns:
+            int: 记录ID，未启用或写入失败时返回None
+        """
+        if not self.config['monitor'].get('history_enabled', True):
+            return None
+
+        try:
+            store = RunHistoryStore(self.config['monitor'].get('history_db_path') or DEFAULT_DB_PATH)
+            run_id = store.record_run(
+                project=training_info['project_name'],
+                start_time=self.start_time,
+                end_time=end_time,
+                method=training_info['method'],
+                host=training_info['hostname'],
+                gpu_summary=training_info['gpu_info'],
+                metrics=self._collect_final_metrics()
+            )
+            logger.info(f"运行记录已保存，ID: {run_id}")
+            return run_id
+        except Exception as e:
+            logger.error(f"保存运行记录失败: {str(e)}")
+            return None
+
+    def _config_fingerprint(self):
+        """根据监控目标生成配置指纹，监控目标变化时旧快照失效"""
+        monitor_config = self.config['monitor']
+        keys = ['project_name', 'check_file_path', 'check_log_path', 'check_log_markers',
+                'check_ckpt_dir', 'check_ckpt_pattern', 'check_ckpt_min_epoch',
+                'check_gpu_power_gpu_ids', 'check_gpu_job_pid', 'check_gpu_job_cgroup', 'check_gpu_job_process_name']
+        payload = json.dumps([monitor_config.get(key) for key in keys], ensure_ascii=False, sort_keys=True)
+        return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+    
+    def get_state(self):
+        """
+        导出监控状态，用于写入快照
+        
+        Returns:
+            dict: 可JSON序列化的监控状态
+        """
+        return {
+            'start_time': self.start_time.isoformat(),
+            'elapsed_time': self.elapsed_time,
+            'low_power_count': self.low_power_count,
+            'host_idle_count': self.host_idle_count,
+            'log_scanner': self.log_scanner.get_state() if self.log_scanner else None,
+            'checkpoint_watcher': self.checkpoint_watcher.get_state() if self.checkpoint_watcher else None,
+            'gpu_attribution': self.gpu_attributor.get_state() if self.gpu_attributor else None,
+            'pending_notification': self.pending_notification,
+        }
+    
+    def restore_state(self, state):
+        """
+        从快照恢复监控状态
+        
+        Args:
+            state (dict): get_state() 导出的状态
+        
+        Returns:
+            bool: 是否恢复了监控进度（只含未发送通知的快照返回False）
+        """
+        self.pending_notification = state.get('pending_notification')
+        if not state.get('start_time'):
+            return False
+        self.start_time = datetime.fromisoformat(state['start_time'])
+        self.elapsed_time = state.get('elapsed_time', 0)
+        self.low_power_count = state.get('low_power_count', 0)
+        self.host_idle_count = state.get('host_idle_count', 0)
+        if state.get('log_scanner') and self.config['monitor']['check_log_enabled']:
+            self._get_log_scanner().set_state(state['log_scanner'])
+        if state.get('checkpoint_watcher') and self.config['monitor'].get('check_ckpt_enabled'):
+            self._get_checkpoint_watcher().set_state(state['checkpoint_watcher'])
+        if state.get('gpu_attribution') and self.config['monitor']['check_gpu_power_gpu_ids'] == 'auto':
+            self._get_job_gpu_ids()
+            self.gpu_attributor.set_state(state['gpu_attribution'])
+        return True
+    
+    def has_resumable_state(self):
+        """
+        检查是否存在属于当前配置、尚未处理完的状态快照（监控进度或未发送的通知）
+        
+        只读取快照，不修改监控器状态，供Web界面启动时判断是否自动恢复监控。
+        
+        Returns:
+            bool: 是否需要恢复监控
+        """
+        monitor_config = self.config['monitor']
+        if not monitor_config.get('state_snapshot_enabled', True):
+            return False
+        state = MonitorStateSnapshot(
+            path=monitor_config.get('state_snapshot_path') or DEFAULT_SNAPSHOT_PATH,
+            fingerprint=self._config_fingerprint()
+        ).load()
+        return bool(state and (state.get('start_time') or state.get('pending_notification')))
+    
+    def _init_snapshot(self):
+        """
+        初始化状态快照，存在有效快照时恢复监控进度
+        
+        Returns:
+            bool: 是否从快照恢复
+        """
+        monitor_config = self.config['monitor']
+        if not monitor_config.get('state_snapshot_enabled', True):
+            return False
+        
+        self.snapshot = MonitorStateSnapshot(
+            path=monitor_config.get('state_snapshot_path') or DEFAULT_SNAPSHOT_PATH,
+            interval=monitor_config.get('state_snapshot_interval', 30),
+            fingerprint=self._config_fingerprint()
+        )
+        state = self.snapshot.load()
+        if not state:
+            return False
+        
+        try:
+            restored = self.restore_state(state)
+        except Exception as e:
+            logger.warning(f"恢复状态快照失败，重新开始监控: {str(e)}")
+            return False
+        if not restored:
+            return False
+        logger.info(f"已从状态快照恢复，任务开始于 {self.start_time.strftime('%Y-%m-%d %H:%M:%S')}，"
+                    f"已等待 {self.elapsed_time} 秒")
+        return True
+    
+    def _finish(self, training_info, end_time, record_history=True, attempts=0):
+        """
+        发送完成通知并记录运行历史
+        
+        通知发送前先写入只含该通知的快照（任务已结束，监控进度不再需要），
+        进程在发送期间退出或发送失败时，重启后会重新发送。
+        
+        Args:
+            training_info (dict): 任务信息
+            end_time (datetime): 结束时间
+            record_history (bool): 是否写入运行历史
+            attempts (int): 此前已尝试发送的次数
+        """
+        self.pending_notification = {
+            'training_info': training_info,
+            'end_time': end_time.isoformat(),
+            'attempts': attempts + 1,
+        }
+        if self.snapshot:
+            self.snapshot.save({'pending_notification': self.pending_notification})
+        
+        webhook_active = self.config['webhook']['enabled'] and self.config['webhook']['url']
+        sent = self.send_notification(training_info)
+        if record_history:
+            self.record_run_history(training_info, end_time)
+        
+        if sent or not webhook_active:
+            self.pending_notification = None
+            if self.snapshot:
+                self.snapshot.clear()
+        else:
+            logger.warning("通知发送失败，已保留在状态快照中，重启监控后将重新发送")
+    
+    def _discard_snapshot_progress(self):
+        """监控正常结束（超时或手动停止）时丢弃快照中的监控进度，只保留尚未发送的完成通知"""
+        if not self.snapshot:
+            return
+        if self.pending_notification:
+            self.snapshot.save({'pending_notification': self.pending_notification})
+        else:
+            self.snapshot.clear()
+    
+    def _resend_pending_notification(self):
+        """
+        重发上次运行遗留的完成通知
+        
+        超过最多发送次数或超过有效期的通知会被丢弃。发送仍失败时通知保留在快照中，下次启动再试。
+        该通知对应的任务已经结束，处理完后本次监控直接结束，不会再次检测到同一个任务而重复通知。
+        """
+        pending = self.pending_notification
+        monitor_config = self.config['monitor']
+        max_attempts = monitor_config.get('state_snapshot_resend_attempts', 3)
+        max_age = monitor_config.get('state_snapshot_resend_max_age', 86400)
+        attempts = pending.get('attempts', 1)
+        try:
+            end_time = datetime.fromisoformat(pending['end_time'])
+            training_info = pending['training_info']
+        except (KeyError, TypeError, ValueError) as e:
+            logger.warning(f"未发送的完成通知格式错误，已丢弃: {str(e)}")
+            end_time = training_info = None
+        
+        if training_info is None:
+            pass
+        elif max_attempts and attempts >= max_attempts:
+            logger.warning(f"完成通知已尝试发送 {attempts} 次仍失败，不再重发")
+        elif max_age and (datetime.now() - end_time).total_seconds() > max_age:
+            logger.warning(f"完成通知已超过 {max_age} 秒未能发送，不再重发")
+        else:
+            logger.info(f"发现未发送的完成通知，重新发送（第 {attempts + 1} 次）")
+            self._finish(training_info, end_time, record_history=False, attempts=attempts)
+            return
+        
+        self.pending_notification = None
+        if self.snapshot:
+            self.snapshot.clear()
+    
     def start_monitoring(self):
         """
         开始监控任务进程
+        
+        无论正常结束、提前返回还是出现异常，都会释放主机资源采集和检查点监视持有的文件描述符。
+        """
+        try:
+            self._monitor_loop()
+        finally:
+            self._release_resources()
+    
+    def _release_resources(self):
+        """关闭主机资源采集器和检查点目录监视器打开的文件描述符"""
+        if self.checkpoint_watcher:
+            self.checkpoint_watcher.close()
+            self.checkpoint_watcher = None
+        if self.host_telemetry:
+            self.host_telemetry.close()
+            self.host_telemetry = None
+    
+    def _monitor_loop(self):
+        """
+        监控主循环
         """
         project_name = self.config['monitor']['project_name']
         check_interval = self.config['monitor']['check_interval']
@@ -369,10 +879,16 @@ class TrainingMonitor:
         duration_title = self.config['webhook']['include_duration_title']
         hostname_title = self.config['webhook']['include_hostname_title']
         gpu_info_title = self.config['webhook']['include_gpu_info_title']
+        host_info_title = self.config['webhook'].get('include_host_info_title', '主机资源')
         
         logger.info(f"开始监控任务进程: {project_name}")
         
-        elapsed_time = 0
+        self._init_snapshot()
+        if self.pending_notification:
+            # 上次运行结束时通知未能发送；该任务已经结束，重发（或丢弃）后结束本次监控
+            self._resend_pending_notification()
+            return
+        
         while not self.should_stop():  # 检查是否应该停止
             flag, method = self.is_training_complete()
             if flag:
@@ -387,6 +903,7 @@ class TrainingMonitor:
                     "project_name": project_name,
                     "hostname": os.uname().nodename if hasattr(os, 'uname') else os.environ.get('COMPUTERNAME', 'Unknown'),
                     "gpu_info": self.get_gpu_info(),
+                    "host_info": self.get_host_info(),
                     "method": method,
 
                     "project_name_title": project_name_title,
@@ -396,23 +913,35 @@ class TrainingMonitor:
                     "duration_title": duration_title,
                     "hostname_title": hostname_title,
                     "gpu_info_title": gpu_info_title,
+                    "host_info_title": host_info_title,
                 }
                 
                 logger.info(f"任务已完成！总耗时: {training_info['duration']}")
-                self.send_notification(training_info)
+                self._finish(training_info, end_time)
                 break
+            
+            if not self.config['monitor'].get('check_host_idle_enabled'):
+                # 保持按频率采样，使完成通知中的主机资源反映最近的负载
+                self._sample_host_telemetry()
+            
+            if self.snapshot:
+                self.snapshot.maybe_save(self.get_state)
                 
             time.sleep(check_interval)
-            elapsed_time += check_interval
+            self.elapsed_time += check_interval
             
             # 如果设置了超时且已超时，则退出
-            if timeout and elapsed_time >= timeout:
-                logger.warning(f"监控超时，已等待 {elapsed_time} 秒")
+            if timeout and self.elapsed_time >= timeout:
+                logger.warning(f"监控超时，已等待 {self.elapsed_time} 秒")
+                self._discard_snapshot_progress()
                 break
                 
             # 定期输出监控状态
-            if elapsed_time % logprint == 0:
-                logger.info(f"监控仍在进行中，已等待 {elapsed_time} 秒")
+            if self.elapsed_time % logprint == 0:
+                logger.info(f"监控仍在进行中，已等待 {self.elapsed_time} 秒")
+        else:
+            # 手动停止视为放弃本次监控，下次启动重新开始；只有进程异常退出时才从快照恢复
+            self._discard_snapshot_progress()
 
 def main():
     parser = argparse.ArgumentParser(description="深度学习任务监控和通知系统")
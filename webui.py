@@ -1,7 +1,23 @@
 import os
 import sys
+import argparse
 import logging
 
+def parse_args():
+    parser = argparse.ArgumentParser(description="TaskNya Web界面")
+    parser.add_argument("--host", default=os.environ.get('FLASK_RUN_HOST', '0.0.0.0'), help="监听地址")
+    parser.add_argument("--port", type=int, default=int(os.environ.get('FLASK_RUN_PORT', 5000)), help="监听端口")
+    parser.add_argument("--server", choices=['dev', 'gevent'], default=os.environ.get('TASKNYA_SERVER', 'dev'),
+                        help="运行模式：dev为Flask开发服务器，gevent为生产模式（需要安装gevent）")
+    return parser.parse_args()
+
+if __name__ == '__main__':
+    args = parse_args()
+    if args.server == 'gevent':
+        # 必须在导入Flask应用之前打补丁，使线程、队列和socket都切换为协程实现
+        from gevent import monkey
+        monkey.patch_all()
+
 # 添加app目录到Python路径
 sys.path.append(os.path.join(os.path.dirname(__file__), 'app'))
 
@@ -14,9 +30,28 @@ from app import app
 if __name__ == '__main__':
     # 确保工作目录是项目根目录
     os.chdir(os.path.dirname(os.path.abspath(__file__)))
-    
+
     print("启动TaskNya Web界面...")
-    print("请在浏览器中访问: http://localhost:5000")
-    
-    # 启动Flask应用
-    app.run(debug=False, host='0.0.0.0', port=5000) 
\ No newline at end of file
+    print(f"请在浏览器中访问: http://localhost:{args.port}")
+
+    if args.server == 'gevent':
+        # 生产模式：单进程协程服务器，所有连接共享同一个监控状态
+        import socket
+        from gevent.pywsgi import WSGIServer, WSGIHandler
+
+        class NoDelayHandler(WSGIHandler):
+            """关闭Nagle算法：pywsgi分两次写出响应头和响应体，
+            否则keep-alive连接上每个请求都会等待客户端的延迟ACK（约40ms）"""
+
+            def __init__(self, sock, *handler_args, **handler_kwargs):
+                try:
+                    sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+                except OSError:
+                    pass
+                super().__init__(sock, *handler_args, **handler_kwargs)
+
+        print("运行模式: gevent")
+        WSGIServer((args.host, args.port), app, log=None, handler_class=NoDelayHandler).serve_forever()
+    else:
+        # 启动Flask应用
+        app.run(debug=False, host=args.host, port=args.port, threaded=True)